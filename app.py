@@ -2,11 +2,18 @@ from tuiapp import TuiApp
 from guiapp import GuiApp
 from info import Info
 from client import Client
+from loadgen import LoadGenerator, parse_stage
+from profiler import get_profiler, PROFILE_ENV
+from server import Service
+import argparse
+import signal
 import sys
 
 class App:
-  def __init__(self, format_path = "info3.json", params_path = "params_map.json"):
-    self.client = Client(format_path = format_path, params_path = params_path)
+  def __init__(self, format_path = "info3.json", params_path = "params_map.json",
+               cassette_path = None, cassette_mode = None, replay_latency = None):
+    self.client = Client(format_path = format_path, params_path = params_path,
+                         cassette_path = cassette_path, cassette_mode = cassette_mode, replay_latency = replay_latency)
 
   def run(self, mode: str = "tui"):
     if self.client.patterns is not None:
@@ -19,9 +26,82 @@ class App:
     else:
       print("patterns is not loaded")
 
+  def load(self, format_option: str, stages, patterns = None, report_path = None, interval: float = 1.0,
+           max_in_flight: int = 64):
+    if self.client.patterns is None:
+      print("patterns is not loaded")
+      return None
+
+    generator = LoadGenerator(self.client, format_option, patterns = patterns, interval = interval,
+                              max_in_flight = max_in_flight)
+    report = generator.run(stages)
+    summary = report["summary"]
+    print(f"requests: {summary['requests']} rps: {summary['rps']:.2f} error_rate: {summary['error_rate']:.3f}")
+    print(f"p50: {summary['p50']} p90: {summary['p90']} p99: {summary['p99']}")
+    if report_path:
+      LoadGenerator.write_report(report, report_path)
+    return report
+
+  def serve(self, host: str = "127.0.0.1", port: int = 8765, socket_path = None):
+    if self.client.patterns is None:
+      print("patterns is not loaded")
+      return
+    Service(self.client, host = host, port = port, socket_path = socket_path).serve_forever()
+
+  def sync(self, url = None):
+    return self.client.sync_params(url)
+
+def parse_args(argv):
+  parser = argparse.ArgumentParser()
+  parser.add_argument("mode", nargs = "?", default = "tui", type = str.lower, choices = ["tui", "gui", "load", "serve", "sync"])
+  parser.add_argument("--format-path", default = "info3.json")
+  parser.add_argument("--params-path", default = "params_map.json")
+  # 記録/再生（--record と --replay は同時に指定できない）
+  cassette = parser.add_mutually_exclusive_group()
+  cassette.add_argument("--record", default = None, metavar = "PATH", help = "レスポンスをカセットに記録する")
+  cassette.add_argument("--replay", default = None, metavar = "PATH", help = "カセットから再生する（ネットワークに接続しない）")
+  parser.add_argument("--replay-latency", default = None, help = "再生時の疑似遅延（秒数 または recorded）")
+  parser.add_argument("--profile", default = None, metavar = "DIR", help = f"プロファイルをDIRに書き出す（環境変数 {PROFILE_ENV} でも指定可）")
+  parser.add_argument("--profile-top", type = int, default = None, metavar = "N", help = "サマリーに表示する関数の数")
+  # load モード用のオプション
+  parser.add_argument("--format", dest = "format_option", default = None, help = "load: get / post_json / post_form")
+  parser.add_argument("--pattern", action = "append", default = None, help = "load: 対象パターン（複数指定可、省略時は全パターン）")
+  parser.add_argument("--stage", action = "append", default = None, help = "load: rate:duration または start-end:duration（複数指定可）")
+  parser.add_argument("--interval", type = float, default = 1.0, help = "load: 集計する時間窓（秒）")
+  parser.add_argument("--report", default = None, help = "load: レポートの出力先（.csv または .json）")
+  parser.add_argument("--max-in-flight", type = int, default = 64, help = "load: 同時に送信中にするリクエストの上限")
+  # serve モード用のオプション
+  parser.add_argument("--host", default = "127.0.0.1", help = "serve: 待ち受けるホスト")
+  parser.add_argument("--port", type = int, default = 8765, help = "serve: 待ち受けるポート")
+  parser.add_argument("--socket", default = None, metavar = "PATH", help = "serve: TCPの代わりにUnixソケットで待ち受ける")
+  # sync モード用のオプション
+  parser.add_argument("--sync-url", default = None, metavar = "URL", help = "sync: 差分を取得するURL（省略時は info3.json の sync_url）")
+  return parser.parse_args(argv)
+
 if __name__ == "__main__":
-  app = App('info3.json')
+  args = parse_args(sys.argv[1:])
+  # SIGTERM でも atexit（JSONFileManager の未書き込みデータの書き込み）が動くよう SystemExit に変換する
+  signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+  if args.profile or args.profile_top:
+    profiler = get_profiler()
+    profiler.configure(args.profile or profiler.output_dir, top_n = args.profile_top)
+  cassette_path = args.record or args.replay
+  cassette_mode = "record" if args.record else ("replay" if args.replay else None)
+  replay_latency = args.replay_latency
+  if replay_latency not in (None, "recorded"):
+    replay_latency = float(replay_latency)
+  app = App(args.format_path, args.params_path,
+            cassette_path = cassette_path, cassette_mode = cassette_mode, replay_latency = replay_latency)
   # app = App(format_path = 'info.json')
 
-  mode = sys.argv[1].lower() if len(sys.argv) > 1 else "tui"
-  app.run(mode)
+  if args.mode == "load":
+    format_option = args.format_option or (app.client.formats[0] if app.client.formats else None)
+    stages = [parse_stage(s) for s in (args.stage or ["1:10"])]
+    app.load(format_option, stages, patterns = args.pattern, report_path = args.report, interval = args.interval,
+             max_in_flight = args.max_in_flight)
+  elif args.mode == "sync":
+    app.sync(args.sync_url)
+  elif args.mode == "serve":
+    app.serve(host = args.host, port = args.port, socket_path = args.socket)
+  else:
+    app.run(args.mode)
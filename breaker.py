@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Hashable, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LatencyTracker:
+    """
+    キー（エンドポイントとフォーマット）ごとのレイテンシから タイムアウトを決める
+
+    read タイムアウトは直近 window 件の p99 × multiplier を min_read〜max_read に収めた値。
+    サンプルが min_samples 件に満たない間は max_read を使う。
+    タイムアウトしたリクエストもサンプルに含め、成功するまでは連続回数に応じて倍々に延ばす。
+    """
+
+    def __init__(self, connect: float = 3.05, min_read: float = 2.0, max_read: float = 30.0,
+                 multiplier: float = 2.0, min_samples: int = 10, window: int = 200):
+        self.connect = connect
+        self.min_read = min_read
+        self.max_read = max_read
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.window = window
+        self.samples: Dict[Hashable, deque] = {}
+        self.timeouts: Dict[Hashable, int] = {}
+        self.lock = threading.Lock()
+
+    def _append(self, key: Hashable, latency: float) -> None:
+        samples = self.samples.get(key)
+        if samples is None:
+            samples = self.samples[key] = deque(maxlen=self.window)
+        samples.append(latency)
+
+    def record(self, key: Hashable, latency: float) -> None:
+        with self.lock:
+            self._append(key, latency)
+            self.timeouts.pop(key, None)
+
+    def record_timeout(self, key: Hashable, elapsed: float) -> None:
+        """
+        read タイムアウトしたリクエストを elapsed 秒のサンプルとして記録する
+        """
+        with self.lock:
+            self._append(key, elapsed)
+            self.timeouts[key] = self.timeouts.get(key, 0) + 1
+
+    def percentile(self, key: Hashable, p: float) -> float:
+        with self.lock:
+            samples = sorted(self.samples.get(key, ()))
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100.0))]
+
+    def timeout(self, key: Hashable) -> Tuple[float, float]:
+        """
+        requests に渡す (connect タイムアウト, read タイムアウト) を返す
+        """
+        with self.lock:
+            count = len(self.samples.get(key, ()))
+            timeouts = self.timeouts.get(key, 0)
+        if count < self.min_samples:
+            return self.connect, self.max_read
+        read = self.percentile(key, 99) * self.multiplier * 2 ** min(timeouts, 16)
+        return self.connect, min(self.max_read, max(self.min_read, read))
+
+    def probe_timeout(self) -> Tuple[float, float]:
+        """
+        half_open の試験送信に使うタイムアウト（遅くなったエンドポイントでも応答を待てるよう max_read）
+        """
+        return self.connect, self.max_read
+
+
+class CircuitBreaker:
+    """
+    サーキットブレーカー
+
+    closed: 通常通り送信する。failure_threshold 回連続で失敗すると open になる。
+    open: reset_timeout 秒間は送信せずに即座に失敗させる。経過後 half_open になる。
+    half_open: half_open_probes 件だけ試験的に送信し、成功すれば closed、失敗すれば open に戻す。
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 15.0, half_open_probes: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.lock = threading.Lock()
+
+    def _update(self, now: float) -> None:
+        if self._state == OPEN and now - self.opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self.probes = 0
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            self._update(time.monotonic())
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        送信してよいかどうか（half_open の場合は試験送信の枠を1つ消費する）
+        """
+        with self.lock:
+            self._update(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self.probes < self.half_open_probes:
+                self.probes += 1
+                return True
+            return False
+
+    def record(self, ok: bool) -> None:
+        with self.lock:
+            if ok:
+                if self._state != CLOSED:
+                    print("サーキットブレーカーを閉じました")
+                self._state = CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    print(f"サーキットブレーカーを開きました（{self.reset_timeout}秒）")
+                self._state = OPEN
+                self.opened_at = time.monotonic()
+
+    def retry_after(self) -> float:
+        """
+        open の場合に half_open になるまでの秒数
+        """
+        with self.lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class Cassette:
+    """
+    リクエスト/レスポンスの組を記録・再生するカセット
+
+    ファイルは1行1エントリのJSON Lines形式で、記録は追記のみ行う。
+    読み込み時に (format, pattern, params) をキーとする辞書を作るため、
+    エントリ数によらず検索はO(1)。同じキーが複数ある場合は後のものが優先される。
+    """
+
+    def __init__(self, file_path: Union[str, Path], mode: str = REPLAY, latency: Union[None, float, str] = None):
+        """
+        Args:
+            file_path: カセットファイルのパス
+            mode: "record" または "replay"
+            latency: 再生時の疑似遅延。秒数、"recorded"（記録時の所要時間）、Noneなら遅延なし
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"unknown cassette mode: {mode}")
+        self.file_path = Path(file_path)
+        self.encoding = 'utf-8'
+        self.mode = mode
+        self.latency = latency
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def make_key(format: str, pattern: Optional[str], params: Any) -> str:
+        return json.dumps([format, pattern, params], sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+
+    def load(self) -> int:
+        """
+        カセットファイルを読み込む
+
+        Returns:
+            読み込んだエントリ数
+        """
+        self.entries = {}
+        if not self.file_path.exists():
+            print(f"カセットが存在しません: {self.file_path}")
+            return 0
+        with open(self.file_path, 'r', encoding=self.encoding) as file:
+            for line_no, line in enumerate(file, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    self.entries[entry["key"]] = entry
+                except (json.JSONDecodeError, KeyError) as e:
+                    # 書き込み途中で終了した行などは読み飛ばす
+                    print(f"カセットの解析エラー（{line_no}行目）: {e}")
+        print(f"カセットを読み込みました: {self.file_path} ({len(self.entries)}件)")
+        return len(self.entries)
+
+    def record(self, format: str, pattern: Optional[str], params: Any, result: Dict[str, Any], elapsed: float = 0.0) -> None:
+        key = self.make_key(format, pattern, params)
+        entry = {"key": key, "elapsed": elapsed, "result": result}
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+        with self.lock:
+            self.entries[key] = entry
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.file_path, 'a', encoding=self.encoding) as file:
+                file.write(line + "\n")
+
+    def replay(self, format: str, pattern: Optional[str], params: Any) -> Optional[Dict[str, Any]]:
+        """
+        記録済みのレスポンスを返す。見つからなければNone
+        """
+        entry = self.entries.get(self.make_key(format, pattern, params))
+        if entry is None:
+            return None
+        if self.latency == "recorded":
+            time.sleep(entry.get("elapsed", 0.0))
+        elif self.latency:
+            time.sleep(float(self.latency))
+        return dict(entry["result"])
+
+    def __len__(self) -> int:
+        return len(self.entries)
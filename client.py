@@ -2,15 +2,29 @@ import requests
 import json
 import urllib.parse
 import os
+import time
+import threading
+from collections import deque
 
 from info import Info
+from cassette import Cassette, RECORD, REPLAY
+from scheduler import RequestScheduler, INTERACTIVE, BACKGROUND
+from endpoints import EndpointPool
+from result import Result
+from profiler import get_profiler
+from sweep import Sweep, is_sweep
+import envelope
+from breaker import LatencyTracker, CircuitBreaker, HALF_OPEN
+from pagination import PageSpec, OFFSET, strip_reserved
+from sync import ParamsSync
 
 class Client:
     """
     HTTPリクエストを送信するためのクライアントクラス
     """
     
-    def __init__(self, format_path = "info3.json", params_path = "params_map.json"):
+    def __init__(self, format_path = "info3.json", params_path = "params_map.json",
+                 cassette_path = None, cassette_mode = None, replay_latency = None):
         self.patterns = None
         self.formats = None
         #self.url = "https://script.google.com/macros/s/AKfycbyVI7e9uZ9c7BDWXDd2-272hX2MefjUyJkzHsahYpAINn3-PPYnhKO4LcpvK9uxrIsq/exec"
@@ -21,6 +35,43 @@ class Client:
         if self.info.patterns is not None:
             self.patterns = self.info.patterns
             self.formats = self.info.formats
+        # info3.json の "rate_limits" / "workers" / "reserved_interactive" でスケジューラを設定する
+        config = self.info.content or {}
+        self.scheduler = RequestScheduler(
+            workers = config.get("workers", 4),
+            rate_limits = config.get("rate_limits"),
+            reserved = config.get("reserved_interactive", 1)
+        )
+        # info3.json の "urls" に複数のデプロイを指定すると、レイテンシとエラー率で振り分ける
+        balancer = config.get("balancer", {})
+        self.endpoints = EndpointPool(
+            config.get("urls") or [self.url],
+            alpha = balancer.get("alpha", 0.3),
+            eject_after = balancer.get("eject_after", 3),
+            cooldown = balancer.get("cooldown", 30.0),
+            probe_timeout = balancer.get("probe_timeout", 60.0),
+            half_life = balancer.get("half_life", 30.0),
+            load = self.scheduler.pressure
+        )
+        self.profiler = get_profiler()
+        # タイムアウトは観測したレイテンシから決め、失敗が続くエンドポイントは即座に失敗させる
+        self.latency = LatencyTracker(**config.get("timeouts", {}))
+        self.breaker_config = config.get("breaker", {})
+        self.breakers = {}
+        self.breakers_lock = threading.Lock()
+        # info3.json に "envelope" があれば post_json のバッチを1リクエストにまとめる
+        envelope_config = config.get("envelope")
+        self.envelope = None
+        if envelope_config is not None:
+            self.envelope = envelope.EnvelopeSizer(**envelope_config) if isinstance(envelope_config, dict) else envelope.EnvelopeSizer()
+        # 接続を使い回すためのセッション（ワーカー数分の接続をプールする）
+        self.session = requests.Session()
+        self.pool_size = None
+        self.resize_pool(self.scheduler.workers)
+        # 記録/再生モード（cassette_mode は "record" または "replay"）
+        self.cassette = None
+        if cassette_path and cassette_mode:
+            self.cassette = Cassette(cassette_path, mode = cassette_mode, latency = replay_latency)
     
     def object_to_url_encoded(self, obj):
         """
@@ -60,7 +111,7 @@ class Client:
             print(error_msg)
             return ""
 
-    def make_get_request(self, url: str, params=None, headers=None, timeout=30):
+    def make_get_request(self, url: str, params=None, headers=None, timeout=None, pattern=None):
         """
         指定されたURLにGETリクエストを送信する関数
         
@@ -68,11 +119,17 @@ class Client:
             url (str): GETリクエストを送信するURL
             params (dict, optional): クエリパラメータ
             headers (dict, optional): リクエストヘッダー
-            timeout (int): タイムアウト時間（秒）
+            timeout (float or tuple, optional): タイムアウト時間（秒）。
+                省略時は観測したレイテンシから (connect, read) を決める
+            pattern (str, optional): カセットのキーに使うパターン名
         
         Returns:
-            dict: レスポンス情報を含む辞書
+            Result: レスポンス情報（辞書形式でも参照できる）
         """
+        if self.cassette is not None and self.cassette.mode == REPLAY:
+            return self._replay('get', pattern, params)
+        if timeout is None:
+            timeout = self.latency.timeout((url, 'get'))
         try:
             # デフォルトヘッダーを設定
             if headers is None:
@@ -86,44 +143,44 @@ class Client:
             print(f"ヘッダー: {json.dumps(headers, indent=2, ensure_ascii=False)}")
             
             # GETリクエストを実行
-            response = requests.get(
-                url=url,
-                params=params,
-                headers=headers,
-                timeout=timeout
-            )
-            
-            # レスポンス情報を取得
-            result = {
-                'status_code': response.status_code,
-                'headers': dict(response.headers),
-                'content': response.text,
-                'url': response.url
-            }
+            started = time.monotonic()
+            with self.profiler.section("request"):
+                response = self.session.get(
+                    url=url,
+                    params=params,
+                    headers=headers,
+                    timeout=timeout
+                )
+            self.latency.record((url, 'get'), time.monotonic() - started)
             
-            # JSONレスポンスの場合は解析
-            try:
-                result['json'] = response.json()
-            except json.JSONDecodeError:
-                result['json'] = None
+            # レスポンス情報を取得（テキスト・JSONは参照時に生成される）
+            result = Result.from_response(response)
             
             print(f"\nレスポンス:")
             print(f"ステータスコード: {response.status_code}")
-            print(f"レスポンス内容: {response.text[:200]}...")
-            print(f"json: {result['json']}")
+            print(f"レスポンス内容: {result.preview()}...")
+
+            if self.cassette is not None and self.cassette.mode == RECORD:
+                self.cassette.record('get', pattern, params, result.to_dict(), time.monotonic() - started)
             
             return result
             
+        except requests.exceptions.ReadTimeout as e:
+            # タイムアウトもサンプルに含め、次のタイムアウトを延ばす
+            self.latency.record_timeout((url, 'get'), time.monotonic() - started)
+            error_msg = f"リクエストエラー: {str(e)}"
+            print(error_msg)
+            return Result.from_error(error_msg)
         except requests.exceptions.RequestException as e:
             error_msg = f"リクエストエラー: {str(e)}"
             print(error_msg)
-            return {'error': error_msg}
+            return Result.from_error(error_msg)
         except Exception as e:
             error_msg = f"予期しないエラー: {str(e)}"
             print(error_msg)
-            return {'error': error_msg}
+            return Result.from_error(error_msg)
 
-    def make_post_request(self, url, format, data=None, headers=None, timeout=30):
+    def make_post_request(self, url, format, data=None, headers=None, timeout=None, pattern=None):
         """
         指定されたURLにPOSTリクエストを送信する関数
         
@@ -131,11 +188,17 @@ class Client:
             url (str): POSTリクエストを送信するURL
             data (dict, optional): 送信するデータ
             headers (dict, optional): リクエストヘッダー
-            timeout (int): タイムアウト時間（秒）
+            timeout (float or tuple, optional): タイムアウト時間（秒）。
+                省略時は観測したレイテンシから (connect, read) を決める
+            pattern (str, optional): カセットのキーに使うパターン名
         
         Returns:
-            dict: レスポンス情報を含む辞書
+            Result: レスポンス情報（辞書形式でも参照できる）
         """
+        if self.cassette is not None and self.cassette.mode == REPLAY:
+            return self._replay(f"post_{format}", pattern, data)
+        if timeout is None:
+            timeout = self.latency.timeout((url, f"post_{format}"))
         try:
             # デフォルトヘッダーを設定
             if headers is None:
@@ -162,132 +225,162 @@ class Client:
             print(f"ヘッダー: {json.dumps(headers, indent=2, ensure_ascii=False)}")
             print(f"format: {format}")
 
+            started = time.monotonic()
             if format == 'json':
                 # POSTリクエストを実行
-                response = requests.post(
-                    url=url,
-                    json=data,
-                    headers=headers,
-                    timeout=timeout
-                )
+                with self.profiler.section("request"):
+                    response = self.session.post(
+                        url=url,
+                        json=data,
+                        headers=headers,
+                        timeout=timeout
+                    )
             else:
                 # POSTリクエストを実行
-                response = requests.post(
-                    url=url,
-                    data=data,
-                    headers=headers,
-                    timeout=timeout
-                )
+                with self.profiler.section("request"):
+                    response = self.session.post(
+                        url=url,
+                        data=data,
+                        headers=headers,
+                        timeout=timeout
+                    )
+            self.latency.record((url, f"post_{format}"), time.monotonic() - started)
 
-            # レスポンス情報を取得
-            result = {
-                'status_code': response.status_code,
-                'headers': dict(response.headers),
-                'content': response.text,
-                'url': response.url
-            }
-            
-            # JSONレスポンスの場合は解析
-            try:
-                result['json'] = response.json()
-            except json.JSONDecodeError:
-                result['json'] = None
+            # レスポンス情報を取得（テキスト・JSONは参照時に生成される）
+            result = Result.from_response(response)
             
             print(f"\nレスポンス:")
             print(f"ステータスコード: {response.status_code}")
-            print(f"レスポンス内容: {response.text[:200]}...")
-            print(f"json: {result['json']}")
+            print(f"レスポンス内容: {result.preview()}...")
+
+            if self.cassette is not None and self.cassette.mode == RECORD:
+                self.cassette.record(f"post_{format}", pattern, data, result.to_dict(), time.monotonic() - started)
 
             return result
             
+        except requests.exceptions.ReadTimeout as e:
+            # タイムアウトもサンプルに含め、次のタイムアウトを延ばす
+            self.latency.record_timeout((url, f"post_{format}"), time.monotonic() - started)
+            error_msg = f"リクエストエラー: {str(e)}"
+            print(error_msg)
+            return Result.from_error(error_msg)
         except requests.exceptions.RequestException as e:
             error_msg = f"リクエストエラー: {str(e)}"
             print(error_msg)
-            return {'error': error_msg}
+            return Result.from_error(error_msg)
         except Exception as e:
             error_msg = f"予期しないエラー: {str(e)}"
             print(error_msg)
-            return {'error': error_msg}
+            return Result.from_error(error_msg)
 
-    def make_post_request_json(self, url, data=None, timeout=30):
-        return self.make_post_request(url, 'json', data, timeout=timeout)
+    def make_post_request_json(self, url, data=None, timeout=None, pattern=None):
+        return self.make_post_request(url, 'json', data, timeout=timeout, pattern=pattern)
 
-    def make_get_request_simple(self, url, params=None, timeout=30):
+    def _replay(self, format, pattern, params):
+        """
+        カセットからレスポンスを返す（ネットワークには接続しない）
+        """
+        result = self.cassette.replay(format, pattern, params)
+        if result is None:
+            error_msg = f"カセットに記録がありません: {format} {pattern}"
+            print(error_msg)
+            return Result.from_error(error_msg)
+        return Result.from_dict(result)
+
+    def make_get_request_simple(self, url, params=None, timeout=None, pattern=None):
         """
         シンプルなGETリクエスト関数
         
         Args:
             url (str): GETリクエストを送信するURL
             params (dict, optional): クエリパラメータ
-            timeout (int): タイムアウト時間（秒）
+            timeout (float or tuple, optional): タイムアウト時間（秒）。
+                省略時は観測したレイテンシから (connect, read) を決める
+            pattern (str, optional): カセットのキーに使うパターン名
         
         Returns:
-            dict: レスポンス情報を含む辞書
+            Result: レスポンス情報（辞書形式でも参照できる）
         """
-        return self.make_get_request(url, params, None, timeout)
+        return self.make_get_request(url, params, None, timeout, pattern=pattern)
 
     def resultx(self, result):
-        json_text = ""
+        """
+        結果を表示して返す
+
+        Result は ret['json_text'] / ret['result'] でも参照できるため、
+        従来のように別の辞書で包まずそのまま返す（整形JSONは参照時に生成される）。
+        """
         if 'error' not in result:
             print(f"\n=== 成功! ===")
             print(f"ステータスコード: {result['status_code']}")
-            if result['json']:
-                json_text = json.dumps(result['json'], indent=2, ensure_ascii=False)
-                print(f"JSONレスポンス: {json_text}")
+            print(f"レスポンスサイズ: {len(result.raw)} bytes")
         else:
             print(f"\n=== エラー ===")
             print(result['error'])
 
-        return {"json_text":json_text, "result": result }
+        return result
 
-    def test_get(self, url, pattern):
-        params = self.make_params(pattern)
-        ret = self.test_get_sub(self.url, params)
+    def test_get(self, url, pattern, params=None, timeout=None):
+        if params is None:
+            with self.profiler.section("make_params"):
+                params = self.make_params(pattern)
+        ret = self.test_get_sub(url, params, pattern=pattern, timeout=timeout)
         print("========================================== GET")
         return ret
 
-    def test_get_sub(self, url, params):
+    def test_get_sub(self, url, params, pattern=None, timeout=None):
         print(f"=== GETリクエストのテスト ==={params}")
         # GETリクエストのテスト
         
         result = self.make_get_request_simple(
             url=url,
-            params=params
+            params=params,
+            timeout=timeout,
+            pattern=pattern
         )
-        ret_result = self.resultx(result)
+        with self.profiler.section("resultx"):
+            ret_result = self.resultx(result)
 
         return ret_result
 
-    def test_post_json(self, url, pattern):
-        params = self.make_params(pattern)
+    def test_post_json(self, url, pattern, params=None, timeout=None):
+        if params is None:
+            with self.profiler.section("make_params"):
+                params = self.make_params(pattern)
 
-        result = self.test_post_sub_json(url, params)
-        ret_result = self.resultx(result)
+        result = self.test_post_sub_json(url, params, pattern=pattern, timeout=timeout)
+        with self.profiler.section("resultx"):
+            ret_result = self.resultx(result)
         print("========================================== POST_JSON")
         return ret_result
 
-    def test_post_sub_json(self, url, params):
+    def test_post_sub_json(self, url, params, pattern=None, timeout=None):
         print("=== POSTリクエストのテスト ===")
         # POSTリクエストのテスト
         
         result = self.make_post_request_json(
             url=url,
-            data=params
+            data=params,
+            timeout=timeout,
+            pattern=pattern
         )
         return result
 
-    def test_post_form(self, url, pattern):
-        params = self.make_params(pattern)
+    def test_post_form(self, url, pattern, params=None, timeout=None):
+        if params is None:
+            with self.profiler.section("make_params"):
+                params = self.make_params(pattern)
 
-        result = self.test_post_sub_form(url, params)
-        ret_result = self.resultx(result)
+        result = self.test_post_sub_form(url, params, pattern=pattern, timeout=timeout)
+        with self.profiler.section("resultx"):
+            ret_result = self.resultx(result)
         print("========================================== POST_FORM")
         return ret_result
 
-    def test_post_sub_form(self, url, params):
+    def test_post_sub_form(self, url, params, pattern=None, timeout=None):
         print("=== POSTリクエストのテスト ===")
         # POSTリクエストのテスト
-        result = self.make_post_request(url, 'form', params)
+        result = self.make_post_request(url, 'form', params, timeout=timeout, pattern=pattern)
         '''
         result = make_post_request_form(
             url=url,
@@ -306,14 +399,17 @@ class Client:
                 print("params_map is empty or not loaded")
                 return None
 
-            params = self.params_map.get(pattern)
+            params = self.info.params_map.get(pattern)
             if params is None:
                 print(f"pattern: {pattern} is not supported")
                 return None
 
-            if isinstance(params, dict):
-                # return a shallow copy to avoid accidental mutation
-                return params.copy()
+            if is_sweep(params):
+                # sweep patterns expand to many requests; a single call uses the first one
+                return Sweep(strip_reserved(params))[0]
+            elif isinstance(params, dict):
+                # return a copy without "$" settings to avoid accidental mutation
+                return strip_reserved(params)
             else:
                 print(f"params for pattern {pattern} has unexpected type: {type(params)}")
                 return None
@@ -321,16 +417,106 @@ class Client:
             print(f"make_params error: {e}")
             return None
 
-    def run(self, format_option : str, pattern_option : str):
+    def iter_params(self, pattern, start=0, limit=None):
+        """
+        Yield concrete parameters for the given pattern.
+        Sweep patterns are expanded lazily, one combination at a time.
+        """
+        params = (self.info.params_map or {}).get(pattern)
+        if is_sweep(params):
+            yield from Sweep(strip_reserved(params)).iter(start, limit)
+        elif start == 0 and limit != 0:
+            params = self.make_params(pattern)
+            if params is not None:
+                yield params
+
+    def page_spec(self, pattern):
+        """
+        Return the PageSpec declared by "$pagination" for the pattern, or None.
+        """
+        return PageSpec.from_params((self.info.params_map or {}).get(pattern))
+
+    def iter_pages(self, format_option : str, pattern_option : str, prefetch = None,
+                   priority = INTERACTIVE, max_pages = None):
+        """
+        ページングされた結果を1ページずつ順に返すジェネレータ
+
+        オフセット方式では次の prefetch ページ（既定はワーカー数）を並行して先読みし、
+        トークン方式では呼び出し側が処理している間に次のページを取得する。
+        先読みは prefetch 件までなのでメモリ使用量は一定。
+        "$pagination" が無いパターンは1ページとして扱う。
+        """
+        if not self.formats or format_option not in self.formats or pattern_option not in self.patterns:
+            print(f"Client.iter_pages {format_option} {pattern_option} is not supported")
+            return
+        params = self.make_params(pattern_option)
+        spec = self.page_spec(pattern_option)
+        if params is None:
+            return
+        if spec is None:
+            yield self.run(format_option, pattern_option, priority)
+            return
+        max_pages = max_pages or spec.max_pages
+        prefetch = max(1, prefetch or self.scheduler.workers)
+
+        def submit(page_params):
+            url = self.endpoints.pick()
+            return url, self.scheduler.submit(url, priority, self._dispatch, format_option, pattern_option, url, page_params)
+
+        def cancel(url, future):
+            # 送信前に取り消せた場合は pick() で確保した試験送信の枠を戻す
+            if future.cancel():
+                self.endpoints.release(url)
+
+        if spec.type == OFFSET:
+            pending = deque()
+            index = 0
+            try:
+                while True:
+                    while len(pending) < prefetch and (max_pages is None or index < max_pages):
+                        pending.append(submit(spec.page_params(params, index)))
+                        index += 1
+                    if not pending:
+                        return
+                    result = pending.popleft()[1].result()
+                    yield result
+                    if spec.is_last(result):
+                        return
+            finally:
+                # 最終ページ以降の先読みは破棄する
+                for url, future in pending:
+                    cancel(url, future)
+        else:
+            job = submit(spec.page_params(params))
+            count = 0
+            try:
+                while job is not None:
+                    result = job[1].result()
+                    count += 1
+                    token = None
+                    if not spec.is_last(result) and (max_pages is None or count < max_pages):
+                        token = spec.next_token(result)
+                    # 呼び出し側が処理している間に次のページを取得しておく
+                    job = submit(spec.page_params(params, token=token)) if token else None
+                    yield result
+            finally:
+                if job is not None:
+                    cancel(*job)
+
+    def run(self, format_option : str, pattern_option : str, priority = INTERACTIVE):
+        """
+        リクエストをスケジューラ経由で送信し、結果を返す
+
+        Args:
+            format_option (str): get / post_json / post_form
+            pattern_option (str): params_map のパターン名
+            priority: "interactive"（UI操作）または "background"（バッチ処理）
+        """
         ret = None
         if format_option in self.formats:
             if pattern_option in self.patterns:
-                if format_option == "post_form":
-                    ret = self.test_post_form(self.url, pattern_option)
-                elif format_option == "post_json":
-                    ret = self.test_post_json(self.url, pattern_option)
-                else:
-                    ret = self.test_get(self.url, pattern_option)
+                url = self.endpoints.pick()
+                ret = self.scheduler.call(url, priority, self._dispatch, format_option, pattern_option, url)
             else:
                 print(f"Client.run pattern_option: {pattern_option} is not supported")
         else:
@@ -338,6 +524,229 @@ class Client:
 
         return ret
 
+    def run_direct(self, format_option : str, pattern_option : str, url = None):
+        """
+        スケジューラ（ワーカー数・レート制限）、サーキットブレーカー、エンドポイントの振り分けを
+        通さず、呼び出したスレッドで url（省略時は最初のエンドポイント）に送信する
+
+        負荷生成のように、同時実行数を呼び出し側で決め、サーバーの応答をそのまま測る場合に使う。
+        タイムアウトは観測したレイテンシで縮めず、常に max_read を使う。
+        """
+        if not self.formats or format_option not in self.formats or pattern_option not in self.patterns:
+            print(f"Client.run_direct {format_option} {pattern_option} is not supported")
+            return None
+        url = url or next(iter(self.endpoints.endpoints))
+        return self._send(format_option, pattern_option, url, timeout = self.latency.probe_timeout())
+
+    def resize_pool(self, size):
+        """
+        セッションの接続プールを size 接続に作り直し、以前の接続数を返す
+        """
+        previous = self.pool_size
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize = size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.pool_size = size
+        return previous
+
+    def run_batch(self, format_option : str, patterns, priority = BACKGROUND):
+        """
+        複数のパターンをスケジューラで並行に送信し、patterns と同じ順序で結果を返す
+
+        対応していないフォーマット・パターンの結果は None になる。
+        post_json でエンベロープが有効な場合は run_envelope でまとめて送信する。
+        """
+        if format_option == "post_json" and self.envelope is not None:
+            return self.run_envelope(patterns, priority)
+        futures = []
+        for pattern_option in patterns:
+            if self.formats and format_option in self.formats and pattern_option in self.patterns:
+                url = self.endpoints.pick()
+                futures.append(self.scheduler.submit(url, priority, self._dispatch, format_option, pattern_option, url))
+            else:
+                print(f"Client.run_batch {format_option} {pattern_option} is not supported")
+                futures.append(None)
+        return [future.result() if future is not None else None for future in futures]
+
+    def run_envelope(self, patterns, priority = BACKGROUND):
+        """
+        複数パターンの params をエンベロープにまとめて post_json で送信し、
+        レスポンスをパターンごとの Result に分解して patterns と同じ順序で返す
+        """
+        sizer = self.envelope or envelope.EnvelopeSizer()
+        results = [None] * len(patterns)
+        entries = []
+        for index, pattern_option in enumerate(patterns):
+            params = self.make_params(pattern_option) if pattern_option in (self.patterns or []) else None
+            if params is None:
+                print(f"Client.run_envelope {pattern_option} is not supported")
+            else:
+                entries.append((index, pattern_option, params))
+
+        futures = []
+        for chunk in envelope.split(entries, sizer):
+            url = self.endpoints.pick()
+            futures.append(self.scheduler.submit(url, priority, self._send_envelope, chunk, url, sizer))
+        for future in futures:
+            for index, result in future.result():
+                results[index] = result
+        return results
+
+    def _send_envelope(self, chunk, url, sizer):
+        if self._replaying():
+            self.endpoints.release(url)
+            with self.profiler.profile("Client.run_envelope"):
+                result = self.make_post_request(url, 'json', data=envelope.pack(chunk))
+            return list(zip([entry[0] for entry in chunk], envelope.demux(result, chunk)))
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            result = self._breaker_error(url, breaker)
+            self.endpoints.defer(url, breaker.retry_after())
+            return list(zip([entry[0] for entry in chunk], envelope.demux(result, chunk)))
+        timeout = self.latency.probe_timeout() if breaker.state == HALF_OPEN else None
+        started = time.monotonic()
+        with self.profiler.profile("Client.run_envelope"):
+            result = self.make_post_request(url, 'json', data=envelope.pack(chunk), timeout=timeout)
+        ok = self._is_success(result)
+        self.endpoints.report(url, time.monotonic() - started, ok)
+        breaker.record(ok)
+        if 'error' not in result and result.status_code == 413 and len(chunk) > 1:
+            # 大きすぎたので上限を縮め、半分ずつ送り直す
+            sizer.shrink()
+            half = len(chunk) // 2
+            return self._send_envelope(chunk[:half], url, sizer) + self._send_envelope(chunk[half:], url, sizer)
+        if 'error' not in result and result.status_code < 400:
+            sizer.grow()
+        with self.profiler.section("demux"):
+            return list(zip([entry[0] for entry in chunk], envelope.demux(result, chunk)))
+
+    def run_sweep(self, format_option : str, pattern_option : str, priority = BACKGROUND,
+                  window = None, start = 0, limit = None):
+        """
+        スイープのパターンを展開しながら送信し、(params, 結果) を順に返すジェネレータ
+
+        送信中のリクエストは window 件まで（既定はワーカー数の2倍）に抑えるため、
+        組み合わせが数百万通りでも展開結果をメモリに保持しない。
+        """
+        if not self.formats or format_option not in self.formats or pattern_option not in self.patterns:
+            print(f"Client.run_sweep {format_option} {pattern_option} is not supported")
+            return
+        window = window or self.scheduler.workers * 2
+        pending = deque()
+        for params in self.iter_params(pattern_option, start, limit):
+            url = self.endpoints.pick()
+            future = self.scheduler.submit(url, priority, self._dispatch, format_option, pattern_option, url, params)
+            pending.append((params, future))
+            if len(pending) >= window:
+                params, future = pending.popleft()
+                yield params, future.result()
+        while pending:
+            params, future = pending.popleft()
+            yield params, future.result()
+
+    def _dispatch(self, format_option, pattern_option, url, params=None):
+        if self._replaying():
+            # 再生はエンドポイントに接続しないため、ブレーカー・エンドポイントの統計には含めない
+            self.endpoints.release(url)
+            with self.profiler.profile("Client.run"):
+                return self._send(format_option, pattern_option, url, params)
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            # 送信しなかったことをプールに伝え、ブレーカーが half_open になるまで他に振り分ける
+            self.endpoints.defer(url, breaker.retry_after())
+            return self._breaker_error(url, breaker)
+        # half_open の試験送信は縮んだタイムアウトで失敗し続けないよう max_read で待つ
+        timeout = self.latency.probe_timeout() if breaker.state == HALF_OPEN else None
+        started = time.monotonic()
+        with self.profiler.profile("Client.run"):
+            ret = self._send(format_option, pattern_option, url, params, timeout)
+        ok = self._is_success(ret)
+        self.endpoints.report(url, time.monotonic() - started, ok)
+        breaker.record(ok)
+        return ret
+
+    def _send(self, format_option, pattern_option, url, params=None, timeout=None):
+        """
+        フォーマットに応じたリクエストを url に送信する（ブレーカー・エンドポイントの統計は更新しない）
+        """
+        if format_option == "post_form":
+            return self.test_post_form(url, pattern_option, params, timeout=timeout)
+        if format_option == "post_json":
+            return self.test_post_json(url, pattern_option, params, timeout=timeout)
+        return self.test_get(url, pattern_option, params, timeout=timeout)
+
+    def _replaying(self):
+        return self.cassette is not None and self.cassette.mode == REPLAY
+
+    def breaker(self, url):
+        """
+        エンドポイントのサーキットブレーカーを返す（無ければ作成する）
+        """
+        with self.breakers_lock:
+            breaker = self.breakers.get(url)
+            if breaker is None:
+                breaker = self.breakers[url] = CircuitBreaker(**self.breaker_config)
+            return breaker
+
+    def _breaker_error(self, url, breaker):
+        error_msg = f"サーキットブレーカー作動中のため送信しません: {url}（再試行まで{breaker.retry_after():.1f}秒）"
+        print(error_msg)
+        return Result.from_error(error_msg)
+
+    def breaker_states(self):
+        """
+        エンドポイントごとのブレーカーの状態（closed / open / half_open）を返す
+        """
+        return {url: self.breaker(url).state for url in self.endpoints.endpoints}
+
+    def breaker_summary(self):
+        """
+        UI表示用のブレーカー状態の文字列
+        """
+        states = self.breaker_states()
+        if len(states) == 1:
+            return f"回路: {next(iter(states.values()))}"
+        return "回路: " + ", ".join(f"#{i + 1} {state}" for i, state in enumerate(states.values()))
+
+    @staticmethod
+    def _is_success(ret):
+        """
+        resultx の戻り値が成功（エラーなし・5xx/429以外）かどうか
+        """
+        if ret is None:
+            return False
+        result = ret["result"]
+        if 'error' in result:
+            return False
+        status = result['status_code']
+        return status < 500 and status != 429
+
+    def endpoint_stats(self):
+        """
+        エンドポイントごとのレイテンシ・エラー率・除外状態を返す
+        """
+        return self.endpoints.stats()
+
+    def sync_params(self, url = None):
+        """
+        同期用のエンドポイント（省略時は info3.json の "sync_url"）から params_map の差分を取り込む
+
+        追加・変更・削除されたパターンだけを受け取り、params_map とパターン一覧をその場で更新する。
+        """
+        url = url or (self.info.content or {}).get("sync_url")
+        if not url:
+            error_msg = "同期先のURLが指定されていません"
+            print(error_msg)
+            return {"status": "error", "error": error_msg}
+        if self.info.params_jsfm is None:
+            error_msg = "params_map が読み込まれていません"
+            print(error_msg)
+            return {"status": "error", "error": error_msg}
+        ret = ParamsSync(self.info, url, session = self.session).sync()
+        # 初回の同期で一覧が作られた場合に備えて参照を揃える
+        self.patterns = self.info.patterns
+        return ret
+
 if __name__ == "__main__":
     client = Client(format_path = "info3.json", params_path = "params_map.json")
     patterns =  client.patterns
@@ -0,0 +1,174 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class EndpointStats:
+    """
+    エンドポイント1つ分の統計情報
+    """
+
+    __slots__ = ("url", "ewma_latency", "ewma_error", "requests", "failures",
+                 "consecutive_failures", "ejected_until", "probing", "updated")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        # 試験送信中の場合はその期限（report されないまま期限を過ぎたら再度試験送信する）
+        self.probing = 0.0
+        # 最後に report された時刻（古い統計を減衰させるのに使う）
+        self.updated = 0.0
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "ewma_latency": self.ewma_latency,
+            "ewma_error": self.ewma_error,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "ejected": self.ejected_until > now or self.probing > now,
+            "ejected_for": max(0.0, self.ejected_until - now),
+        }
+
+
+class EndpointPool:
+    """
+    複数のエンドポイントURLからレイテンシとエラー率で送信先を選ぶ
+
+    - EWMA（指数加重移動平均）でレイテンシとエラー率を追跡
+    - スコアの逆数に比例した確率で選ぶ（遅いデプロイとそのクォータも使い、統計も更新され続ける）
+    - 最後の report から時間が経ったエラー率は half_life 秒ごとに半減させる
+    - load（スケジューラの pressure）を渡すと、キューの深さとトークン待ちもスコアに加える
+    - 連続で失敗したエンドポイントは cooldown 秒間除外し、その後1件だけ試験的に送る
+      （試験送信の結果が probe_timeout 秒以内に report されなければ、もう一度試験送信する）
+    """
+
+    def __init__(self, urls: List[str], alpha: float = 0.3, eject_after: int = 3,
+                 cooldown: float = 30.0, error_penalty: float = 4.0, probe_timeout: float = 60.0,
+                 half_life: float = 30.0, load: Optional[Callable[[str], Tuple[int, float]]] = None):
+        if not urls:
+            raise ValueError("urls is empty")
+        self.endpoints = {url: EndpointStats(url) for url in urls}
+        self.alpha = alpha
+        self.eject_after = eject_after
+        self.cooldown = cooldown
+        self.error_penalty = error_penalty
+        self.probe_timeout = probe_timeout
+        self.half_life = half_life
+        self.load = load
+        self.lock = threading.Lock()
+
+    def _score(self, stats: EndpointStats, now: float) -> float:
+        """
+        小さいほど良いスコア（未計測のエンドポイントは 0）
+        """
+        if stats.ewma_latency is None:
+            return 0.0
+        error = stats.ewma_error
+        if self.half_life > 0 and stats.updated:
+            error *= 0.5 ** ((now - stats.updated) / self.half_life)
+        score = stats.ewma_latency * (1.0 + self.error_penalty * error)
+        if self.load is not None:
+            # 先に並んでいるジョブの分だけ待ち、トークンが無ければ補充まで待つ
+            queued, wait = self.load(stats.url)
+            score = score * (1 + queued) + wait
+        return score
+
+    def pick(self) -> str:
+        """
+        次に送信するエンドポイントのURLを返す
+        """
+        with self.lock:
+            now = time.monotonic()
+            healthy = []
+            for stats in self.endpoints.values():
+                if stats.probing > now:
+                    continue
+                if stats.ejected_until > now:
+                    continue
+                if stats.ejected_until:
+                    # クールダウン明け: 1件だけ試験送信して復帰させるか判断する
+                    stats.probing = now + self.probe_timeout
+                    return stats.url
+                healthy.append(stats)
+            if not healthy:
+                # すべて除外中の場合は復帰が最も近いものに送る
+                return min(self.endpoints.values(), key=lambda s: s.ejected_until).url
+            if len(healthy) == 1:
+                return healthy[0].url
+            unmeasured = [stats for stats in healthy if stats.ewma_latency is None]
+            if unmeasured:
+                # 未計測のエンドポイントを優先して試す
+                return random.choice(unmeasured).url
+            weights = [1.0 / max(self._score(stats, now), 1e-6) for stats in healthy]
+            return random.choices(healthy, weights)[0].url
+
+    def report(self, url: str, latency: float, ok: bool) -> None:
+        """
+        リクエスト結果を記録する
+        """
+        with self.lock:
+            stats = self.endpoints.get(url)
+            if stats is None:
+                return
+            stats.requests += 1
+            stats.updated = time.monotonic()
+            if stats.ewma_latency is None:
+                stats.ewma_latency = latency
+            else:
+                stats.ewma_latency += self.alpha * (latency - stats.ewma_latency)
+            stats.ewma_error += self.alpha * ((0.0 if ok else 1.0) - stats.ewma_error)
+            if ok:
+                stats.consecutive_failures = 0
+                if stats.probing or stats.ejected_until:
+                    print(f"エンドポイントを復帰させました: {url}")
+                    # 除外前のエラー率が残っていると選ばれにくいままになるため、リセットする
+                    stats.ewma_error = 0.0
+                stats.probing = 0.0
+                stats.ejected_until = 0.0
+                return
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.probing or stats.consecutive_failures >= self.eject_after:
+                stats.probing = 0.0
+                stats.ejected_until = time.monotonic() + self.cooldown
+                print(f"エンドポイントを{self.cooldown}秒間除外します: {url}")
+
+    def release(self, url: str) -> None:
+        """
+        pick() したが送信しなかった（キャンセルされた）場合に呼び、試験送信の枠を戻す
+        """
+        with self.lock:
+            stats = self.endpoints.get(url)
+            if stats is not None:
+                stats.probing = 0.0
+
+    def defer(self, url: str, delay: Optional[float] = None) -> None:
+        """
+        サーキットブレーカーが送信を拒否した場合に呼び、delay 秒（省略時は cooldown）除外する
+
+        delay が 0 の場合（half_open で試験送信の結果待ち）は、その結果が report されるまで
+        （最長 probe_timeout 秒）除外する。試験送信の枠も戻すため、除外が明けたら再度試験送信される。
+        """
+        if delay is None:
+            delay = self.cooldown
+        elif delay <= 0:
+            delay = self.probe_timeout
+        with self.lock:
+            stats = self.endpoints.get(url)
+            if stats is None:
+                return
+            stats.probing = 0.0
+            stats.ejected_until = max(stats.ejected_until, time.monotonic() + delay)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            now = time.monotonic()
+            return [stats.to_dict(now) for stats in self.endpoints.values()]
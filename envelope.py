@@ -0,0 +1,95 @@
+"""
+バッチエンベロープのプロトコル（post_json）
+
+リクエスト:
+    {"batch": [{"pattern": "p1", "params": {...}}, {"pattern": "p2", "params": {...}}, ...]}
+
+レスポンス（要素の順序はリクエストと同じ）:
+    {"results": [{"status": 200, "body": {...}}, {"status": 500, "error": "..."}, ...]}
+
+本文が大きすぎる場合、サーバーは 413 を返す。クライアントはエンベロープを
+半分に分割して再送し、以降のエンベロープの上限サイズも小さくする。
+"""
+
+import json
+import threading
+from typing import Any, Dict, Iterator, List, Tuple
+
+from result import Result
+
+BATCH_KEY = "batch"
+RESULTS_KEY = "results"
+
+
+class EnvelopeSizer:
+    """
+    エンベロープの上限サイズ（バイト数）を調整する
+
+    413 を受け取ると半分に縮め、成功するたびに少しずつ ceiling まで戻す。
+    """
+
+    def __init__(self, limit: int = 256 * 1024, floor: int = 4 * 1024, ceiling: int = 4 * 1024 * 1024,
+                 max_items: int = 100):
+        self.limit = limit
+        self.floor = floor
+        self.ceiling = ceiling
+        self.max_items = max_items
+        self.lock = threading.Lock()
+
+    def shrink(self) -> None:
+        with self.lock:
+            self.limit = max(self.floor, self.limit // 2)
+            print(f"エンベロープの上限を縮小しました: {self.limit} bytes")
+
+    def grow(self) -> None:
+        with self.lock:
+            self.limit = min(self.ceiling, self.limit + self.limit // 8)
+
+
+def entry_size(pattern: str, params: Dict[str, Any]) -> int:
+    return len(json.dumps({"pattern": pattern, "params": params}, ensure_ascii=False).encode('utf-8')) + 1
+
+
+def split(entries: List[Tuple[int, str, Dict[str, Any]]], sizer: EnvelopeSizer) -> Iterator[List[Tuple[int, str, Dict[str, Any]]]]:
+    """
+    (添字, パターン, params) のリストを、上限サイズと件数に収まるエンベロープに分ける
+
+    1件で上限を超える場合はその1件だけのエンベロープにする。
+    """
+    chunk = []
+    size = len(BATCH_KEY) + 6
+    for entry in entries:
+        n = entry_size(entry[1], entry[2])
+        if chunk and (size + n > sizer.limit or len(chunk) >= sizer.max_items):
+            yield chunk
+            chunk = []
+            size = len(BATCH_KEY) + 6
+        chunk.append(entry)
+        size += n
+    if chunk:
+        yield chunk
+
+
+def pack(chunk: List[Tuple[int, str, Dict[str, Any]]]) -> Dict[str, Any]:
+    return {BATCH_KEY: [{"pattern": pattern, "params": params} for _, pattern, params in chunk]}
+
+
+def demux(result: Result, chunk: List[Tuple[int, str, Dict[str, Any]]]) -> List[Result]:
+    """
+    エンベロープのレスポンスをパターンごとの Result に分解する
+    """
+    if 'error' in result:
+        return [Result.from_error(result['error']) for _ in chunk]
+    items = result.json.get(RESULTS_KEY) if isinstance(result.json, dict) else None
+    if result.status_code >= 400 or not isinstance(items, list) or len(items) != len(chunk):
+        error_msg = f"エンベロープのレスポンスが不正です: status={result.status_code}"
+        return [Result.from_error(error_msg) for _ in chunk]
+    ret = []
+    for item in items:
+        if not isinstance(item, dict) or 'error' in item:
+            ret.append(Result.from_error(str(item.get('error') if isinstance(item, dict) else item)))
+            continue
+        # ヘッダーはエンベロープのものを共有する（コピーしない）
+        ret.append(Result.from_json(item.get("status", result.status_code), result.url,
+                                    item.get("body"), result.raw_headers))
+    return ret
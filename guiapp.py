@@ -1,19 +1,31 @@
 import tkinter as tk
+from tkinter import filedialog
+import os
+import queue
+import tempfile
+import threading
 from typing import List, Callable
 from info import Info
 from client import Client
+from result import Result
+from profiler import get_profiler
 
 class GuiApp():
     """
     文字列のリストから縦一列のボタン群を生成し、
     クリックされたボタンの文字列を返す機能を持つクラス。
     """
-    def __init__(self, client):
+    def __init__(self, client, display_limit: int = 64 * 1024, chunk_size: int = 4096,
+                 retain_limit: int = 1024 * 1024):
         """初期化メソッド
         
         Args:
             radio_options: ラジオボタンに表示する文字列の配列
             button_options: ボタンに表示する文字列の配列
+            display_limit: TextAreaに一度に表示する最大文字数（「さらに表示」で追加表示）
+            chunk_size: after_idle 1回あたりに挿入する文字数
+            retain_limit: ページの追記でメモリに保持する最大文字数
+                （超えた分は一時ファイルに書き出し、「保存」でのみ参照できる）
         """
         # super().__init__()
         self.client = client
@@ -22,6 +34,28 @@ class GuiApp():
         self.format = None
         self.pattern = None
         self.callback = None
+        self.display_limit = display_limit
+        self.chunk_size = chunk_size
+        self.retain_limit = retain_limit
+        # 表示中の結果と、分割描画の状態
+        # （追記のたびに文字列を連結し直さないよう、テキストは断片のリストで持つ）
+        self.current_result = None
+        self.render_chunks = []
+        self.render_length = 0
+        self.render_index = 0
+        self.render_offset = 0
+        self.render_pos = 0
+        self.render_end = 0
+        self.render_cap = 0
+        self.render_job = None
+        self.render_generation = 0
+        # retain_limit を超えた追記の書き出し先（パス, 文字数, バイト数）
+        self.overflow_path = None
+        self.overflow_chars = 0
+        self.overflow_bytes = 0
+        # バックグラウンド処理の完了通知（Tkはメインスレッドからのみ操作する）
+        self.background_results = queue.Queue()
+        self.profiler = get_profiler()
 
     def run(self):
         # 1. ボタンがクリックされたときに実行する関数を定義
@@ -36,21 +70,42 @@ class GuiApp():
             if lbl is not None:
                 lbl.config(text=f"選択された項目: {clicked_string}")
             self.pattern = clicked_string
+            # ページングされたパターンは届いたページから順に追記する
+            try:
+                spec = self.client.page_spec(self.pattern)
+            except ValueError as e:
+                # "$pagination" の設定が不正な場合は結果の代わりにエラーを表示する
+                self.current_result = None
+                self._render_text(f"Error: {self.pattern}: {e}")
+                return
+            if spec is not None:
+                self._stream_pages(self.format, self.pattern)
+                return
             # 呼び出しの戻り値を取得してTextAreaに表示する
             try:
-                result = self.client.run(format_option=self.format, pattern_option=self.pattern)
+                with self.profiler.section("Client.run"):
+                    result = self.client.run(format_option=self.format, pattern_option=self.pattern)
             except Exception as e:
                 result = f"Error: {e}"
 
             # TextArea がまだ作られていない場合は無視
             try:
-                # 既存の内容をクリアしてから結果を挿入
-                self.text_area.delete('1.0', tk.END)
-                # 非文字列でも扱えるように変換
-                self.text_area.insert(tk.END, str(result))
+                # Result は本文のみを文字列化するので、それを分割して描画する
+                self.current_result = result
+                with self.profiler.section("render"):
+                    self._render_text(str(result))
             except Exception:
                 pass
 
+            # サーキットブレーカーの状態を表示
+            lbl = getattr(self, 'breaker_label', None)
+            if lbl is not None:
+                lbl.config(text=self.client.breaker_summary())
+
+            # プロファイルはこの関数を抜けた後に確定するので、アイドル時にパネルを更新する
+            if self.profiler.enabled:
+                self.root.after_idle(self._update_profile_panel)
+
         # 2. ラジオボタンが選択されたときに実行する関数を定義
         def handle_radio_selection(selected_string: str):
             """
@@ -62,11 +117,12 @@ class GuiApp():
                 lbl.config(text=f"選択されたラジオボタン: {selected_string}")
             self.format = selected_string
 
-        self.callback = handle_button_click
+        self.callback = self.profiler.wrap("GuiApp.handle_button_click", handle_button_click)
         self.radio_callback = handle_radio_selection
 
         # 3. メインのウィンドウを作成
         root = tk.Tk()
+        self.root = root
         root.title("文字列リストからのボタン生成 + ラジオボタン")
         root.geometry("300x500") # ウィンドウの初期サイズ
 
@@ -105,6 +161,17 @@ class GuiApp():
         self.text_area = tk.Text(root, height=8, wrap='word')
         self.text_area.pack(fill='both', expand=False, pady=5, padx=10)
 
+        # 表示操作用のボタン（さらに表示・整形表示・保存）
+        self.view_frame = tk.Frame(root)
+        self.view_frame.pack(fill='x', padx=10)
+        self.more_button = tk.Button(self.view_frame, text="さらに表示", state='disabled', command=self._load_more)
+        self.more_button.pack(side='left', padx=2)
+        self.pretty_button = tk.Button(self.view_frame, text="整形表示", command=self._show_pretty)
+        self.pretty_button.pack(side='left', padx=2)
+        self.save_button = tk.Button(self.view_frame, text="保存", command=self._save_result)
+        self.save_button.pack(side='left', padx=2)
+        self.root.after(50, self._poll_background)
+
         # ボタン用のキャンバスとスクロールバーを配置してからボタン群を生成（先頭に Exit ボタン）
         self.button_canvas.pack(fill='x', padx=10, pady=5)
         self.button_scrollbar.pack(fill='x', padx=10)
@@ -120,11 +187,237 @@ class GuiApp():
         self.radio_result_label = tk.Label(root, text="ラジオボタンを選択してください", font=("Helvetica", 12))
         self.radio_result_label.pack(pady=10)
 
+        # サーキットブレーカーの状態を表示するラベル
+        self.breaker_label = tk.Label(root, text=self.client.breaker_summary(), font=("Helvetica", 10))
+        self.breaker_label.pack(pady=2)
+
+        # プロファイル有効時は上位の関数を表示するパネルを配置
+        self.profile_area = None
+        if self.profiler.enabled:
+            self.profile_area = tk.Text(root, height=10, wrap='none', font=("Courier", 9))
+            self.profile_area.pack(fill='both', expand=True, pady=5, padx=10)
+
         # アプリケーションのメインループを開始
         root.mainloop()
+        self._discard_overflow()
 
     
 
+    def _update_profile_panel(self) -> None:
+        if self.profile_area is None:
+            return
+        self.profile_area.delete('1.0', tk.END)
+        self.profile_area.insert(tk.END, self.profiler.summary())
+
+    def _render_text(self, text: str) -> None:
+        """
+        TextAreaをクリアし、text を display_limit 文字まで after_idle で分割して挿入する
+        """
+        if self.render_job is not None:
+            self.root.after_cancel(self.render_job)
+            self.render_job = None
+        self.render_generation += 1
+        self.text_area.delete('1.0', tk.END)
+        self._discard_overflow()
+        self.render_chunks = [text] if text else []
+        self.render_length = len(text)
+        self.render_index = 0
+        self.render_offset = 0
+        self.render_pos = 0
+        self.render_cap = self.display_limit
+        self.render_end = min(self.render_length, self.render_cap)
+        self.more_button.config(state='disabled')
+        self._schedule_chunk()
+
+    def _append_text(self, generation: int, text: str) -> None:
+        """
+        描画中のテキストに追記する（display_limit を超えた分は「さらに表示」で表示し、
+        retain_limit を超えた分は一時ファイルに書き出す）
+        """
+        if generation != self.render_generation:
+            return
+        self._remove_truncated_marker()
+        if self.overflow_path is None and self.render_length + len(text) <= self.retain_limit:
+            self.render_chunks.append(text)
+            self.render_length += len(text)
+            self.render_end = min(self.render_length, self.render_cap)
+        else:
+            self._write_overflow(text)
+        if self.render_job is None:
+            self._schedule_chunk()
+
+    def _write_overflow(self, text: str) -> None:
+        if self.overflow_path is None:
+            fd, self.overflow_path = tempfile.mkstemp(prefix="tkinterx-", suffix=".txt")
+            os.close(fd)
+        data = text.encode('utf-8')
+        with open(self.overflow_path, 'ab') as file:
+            file.write(data)
+        self.overflow_chars += len(text)
+        self.overflow_bytes += len(data)
+
+    def _discard_overflow(self) -> None:
+        if self.overflow_path is not None:
+            try:
+                os.unlink(self.overflow_path)
+            except OSError:
+                pass
+        self.overflow_path = None
+        self.overflow_chars = 0
+        self.overflow_bytes = 0
+
+    def _next_text(self, count: int) -> str:
+        """
+        未描画のテキストを先頭から count 文字取り出す
+        """
+        parts = []
+        while count > 0 and self.render_index < len(self.render_chunks):
+            chunk = self.render_chunks[self.render_index]
+            part = chunk[self.render_offset:self.render_offset + count]
+            parts.append(part)
+            count -= len(part)
+            self.render_offset += len(part)
+            if self.render_offset >= len(chunk):
+                self.render_index += 1
+                self.render_offset = 0
+        return "".join(parts)
+
+    def _remove_truncated_marker(self) -> None:
+        if self.text_area.tag_ranges("truncated"):
+            self.text_area.delete("truncated.first", "truncated.last")
+
+    def _stream_pages(self, format_option: str, pattern_option: str) -> None:
+        """
+        client.iter_pages を別スレッドで回し、届いたページをTextAreaに追記する
+        """
+        self.current_result = None
+        self._render_text("")
+        generation = self.render_generation
+        self.result_label.config(text=f"取得中: {pattern_option}")
+
+        def worker():
+            count = 0
+            try:
+                for count, page in enumerate(self.client.iter_pages(format_option, pattern_option), 1):
+                    if generation != self.render_generation:
+                        # 別のボタンが押されたら残りのページは取得しない
+                        return
+                    text = f"--- {count}ページ目 ---\n{page}\n"
+                    self.background_results.put((lambda t: self._append_text(generation, t), text))
+                message = f"{count}ページ取得しました: {pattern_option}"
+            except Exception as e:
+                message = f"Error: {e}"
+            self.background_results.put((lambda m: self.result_label.config(text=m), message))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _schedule_chunk(self) -> None:
+        generation = self.render_generation
+        self.render_job = self.root.after_idle(lambda: self._render_chunk(generation))
+
+    def _render_chunk(self, generation: int) -> None:
+        self.render_job = None
+        if generation != self.render_generation:
+            return
+        end = min(self.render_pos + self.chunk_size, self.render_end)
+        if end > self.render_pos:
+            self.text_area.insert(tk.END, self._next_text(end - self.render_pos))
+        self.render_pos = end
+        if self.render_pos < self.render_end:
+            self._schedule_chunk()
+        elif self.render_end < self.render_length:
+            rest = self.render_length - self.render_end + self.overflow_chars
+            self.text_area.insert(tk.END, f"\n... (残り {rest} 文字。「さらに表示」で続きを表示)", "truncated")
+            self.more_button.config(state='normal')
+        elif self.overflow_chars:
+            self.text_area.insert(tk.END, f"\n... (残り {self.overflow_chars} 文字。「保存」で全文を書き出せます)",
+                                  "truncated")
+
+    def _load_more(self) -> None:
+        """
+        省略表示を取り除き、次の display_limit 文字を描画する
+        """
+        if self.render_end >= self.render_length:
+            return
+        self._remove_truncated_marker()
+        self.render_cap = self.render_end + self.display_limit
+        self.render_end = min(self.render_length, self.render_cap)
+        self.more_button.config(state='disabled')
+        self._schedule_chunk()
+
+    def _show_pretty(self) -> None:
+        """
+        JSONレスポンスの整形をバックグラウンドで行い、完了したら描画する
+        """
+        result = self.current_result
+        if result is None:
+            return
+        self.result_label.config(text="整形中...")
+
+        def pretty():
+            if isinstance(result, Result) and result.json is not None:
+                return result.json_text
+            return str(result)
+
+        def done(text):
+            if result is self.current_result:
+                self.result_label.config(text="整形表示")
+                self._render_text(text)
+
+        self._run_in_background(pretty, done)
+
+    def _save_result(self) -> None:
+        """
+        表示中の結果の全文（省略部分を含む）をファイルに保存する
+        """
+        if not self.render_length:
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".txt")
+        if not path:
+            return
+        # 追記が続いても保存する範囲が変わらないよう、この時点の断片と書き出し済みのバイト数を控える
+        chunks = list(self.render_chunks)
+        overflow_path = self.overflow_path
+        overflow_bytes = self.overflow_bytes
+
+        def save():
+            with open(path, 'w', encoding='utf-8') as file:
+                file.writelines(chunks)
+            if overflow_path is not None:
+                with open(overflow_path, 'rb') as src, open(path, 'ab') as dst:
+                    remaining = overflow_bytes
+                    while remaining > 0:
+                        data = src.read(min(remaining, 1024 * 1024))
+                        if not data:
+                            break
+                        dst.write(data)
+                        remaining -= len(data)
+            return path
+
+        self._run_in_background(save, lambda p: self.result_label.config(text=f"保存しました: {p}"))
+
+    def _run_in_background(self, func: Callable, callback: Callable) -> None:
+        """
+        func を別スレッドで実行し、戻り値を callback にメインスレッドで渡す
+        """
+        def worker():
+            try:
+                value = func()
+            except Exception as e:
+                value = f"Error: {e}"
+            self.background_results.put((callback, value))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _poll_background(self) -> None:
+        try:
+            while True:
+                callback, value = self.background_results.get_nowait()
+                callback(value)
+        except queue.Empty:
+            pass
+        self.root.after(50, self._poll_background)
+
     def _create_buttons(self):
         """
         リストの各要素に対応するボタンを生成して、フレーム内に縦一列に配置する。
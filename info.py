@@ -11,12 +11,14 @@ class Info:
     self.patterns = None
     self.formats = None
     self.params_map = None
+    self.content = None
 
     self.format_jsfm = JSONFileManager(format_path)
     content = self.format_jsfm.load()
     # print(f"App:load_info:content: {content}")
 
     if content is not None:
+      self.content = content
     # 使用例：文字列配列を渡してアプリを起動
       self.formats = content["format"]
 
@@ -1,8 +1,57 @@
+import atexit
 import json
 import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from typing import Any, Dict, List, Optional, Union
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def _file_lock(lock_path: Path):
+    """
+    プロセス間で共有するアドバイザリロック（ロック用のファイルを排他ロックする）
+    """
+    with open(lock_path, 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _fsync_dir(path: Path) -> None:
+    """
+    ディレクトリをfsyncしてリネームを永続化する（対応していないOSでは何もしない）
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
 
 class JSONFileManager:
     """
@@ -14,19 +63,39 @@ class JSONFileManager:
     - ファイルの存在確認
     - バックアップ作成
     - エラーハンドリング
+    - 書き込みの遅延・集約（write_behind）とプロセス間ロック
     """
     
-    def __init__(self, file_path: Union[str, Path]):
+    def __init__(self, file_path: Union[str, Path], write_behind: bool = False, delay: float = 0.5,
+                 max_delay: Optional[float] = None, durable: bool = True):
         """
         JSONFileManagerの初期化
         
         Args:
             file_path: JSONファイルのパス
+            write_behind: Trueの場合、write() はすぐに書き込まず、delay 秒間書き込みが
+                無かった時点で最後のデータだけを1回書き込む。終了時の書き込みは atexit で
+                行うため、SIGTERM などのシグナルで終了する場合は SystemExit に変換しておくこと
+                （app.py では SIGTERM を SystemExit に変換している）
+            delay: 書き込みを待つ静止時間（秒）
+            max_delay: 書き込みが続いても、最初の write() からこの秒数が経てば書き込む
+                （省略時は delay の10倍）
+            durable: ファイルとディレクトリをfsyncする
         """
         self.file_path = Path(file_path)
         self.encoding = 'utf-8'
         self.file = None
         self.data = None
+        self.write_behind = write_behind
+        self.delay = delay
+        self.max_delay = max_delay if max_delay is not None else delay * 10
+        self.durable = durable
+        self.lock = threading.Lock()
+        self.pending = None
+        self.pending_since = None
+        self.timer = None
+        if write_behind:
+            atexit.register(self.flush)
     
     def get_keys(self):
         """
@@ -48,6 +117,9 @@ class JSONFileManager:
             読み込んだJSONデータ（辞書、リスト、その他）
             ファイルが存在しない場合やエラー時はNone
         """
+        if self.write_behind:
+            # 未書き込みのデータがあれば先に書き込む
+            self.flush()
         try:
             if not self.file_path.exists():
                 print(f"ファイルが存在しません: {self.file_path}")
@@ -78,22 +150,76 @@ class JSONFileManager:
             
         Returns:
             書き込み成功時True、失敗時False
+            （write_behind の場合は書き込みを予約できればTrue）
         """
+        # 呼び出し側が後から data を変更しても影響しないよう、この時点でシリアライズする
+        try:
+            text = json.dumps(data, ensure_ascii=False, indent=2)
+        except (TypeError, ValueError) as e:
+            print(f"JSONのシリアライズエラー: {e}")
+            return False
+        if self.write_behind:
+            with self.lock:
+                now = time.monotonic()
+                self.pending = (text, create_backup or (self.pending is not None and self.pending[1]))
+                if self.pending_since is None:
+                    self.pending_since = now
+                if self.timer is not None:
+                    self.timer.cancel()
+                # 書き込みが続く場合でも max_delay を超えて待たない
+                wait = min(self.delay, max(0.0, self.pending_since + self.max_delay - now))
+                self.timer = threading.Timer(wait, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+            return True
+        return self._write_now(text, create_backup)
+
+    def flush(self) -> bool:
+        """
+        write_behind で予約されたデータを書き込む
+
+        Returns:
+            書き込み成功時、または予約が無い場合True
+            （失敗した場合は予約を残し、次の write() / flush() で再度書き込む）
+        """
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            pending = self.pending
+            if pending is None:
+                return True
+            # 書き込み中に次の write() が来ても順序が入れ替わらないよう、ロックを保持したまま書き込む
+            if not self._write_now(*pending):
+                return False
+            self.pending = None
+            self.pending_since = None
+            return True
+
+    def _write_now(self, text: str, create_backup: bool) -> bool:
+        temp_path = None
         try:
             # ディレクトリが存在しない場合は作成
             self.file_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # バックアップ作成
-            if create_backup and self.file_path.exists():
-                self._create_backup()
-            
-            # 一時ファイルに書き込み（アトミックな書き込み）
-            temp_path = self.file_path.with_suffix('.tmp')
-            with open(temp_path, 'w', encoding=self.encoding) as file:
-                json.dump(data, file, ensure_ascii=False, indent=2)
-            
-            # 一時ファイルを本ファイルに移動
-            temp_path.replace(self.file_path)
+            with _file_lock(self.file_path.with_name(self.file_path.name + '.lock')):
+                # バックアップ作成
+                if create_backup and self.file_path.exists():
+                    self._create_backup()
+                
+                # 一意な一時ファイルに書き込み（アトミックな書き込み）
+                fd, name = tempfile.mkstemp(dir=self.file_path.parent, prefix=self.file_path.name + '.', suffix='.tmp')
+                temp_path = Path(name)
+                with os.fdopen(fd, 'w', encoding=self.encoding) as file:
+                    file.write(text)
+                    if self.durable:
+                        file.flush()
+                        os.fsync(file.fileno())
+                
+                # 一時ファイルを本ファイルに移動
+                temp_path.replace(self.file_path)
+                if self.durable:
+                    _fsync_dir(self.file_path.parent)
             
             print(f"JSONファイルに書き込みました: {self.file_path}")
             return True
@@ -109,7 +235,7 @@ class JSONFileManager:
             return False
         finally:
             # 一時ファイルを削除
-            if 'temp_path' in locals() and temp_path.exists():
+            if temp_path is not None and temp_path.exists():
                 try:
                     temp_path.unlink()
                 except Exception:
@@ -119,12 +245,23 @@ class JSONFileManager:
         """
         既存ファイルのバックアップを作成
         
+        本ファイルは一時ファイルとの置き換えで更新され、中身が書き換わることはないため、
+        ハードリンクで現在の内容を残す（ファイル全体をコピーしない）。
+        ハードリンクが使えないファイルシステムではコピーする。
+        
         Raises:
             Exception: バックアップ作成に失敗した場合
         """
         try:
             backup_path = self.file_path.with_suffix('.bak')
-            self.file_path.rename(backup_path)
+            link_path = backup_path.with_name(backup_path.name + '.tmp')
+            try:
+                if link_path.exists():
+                    link_path.unlink()
+                os.link(self.file_path, link_path)
+                link_path.replace(backup_path)
+            except OSError:
+                shutil.copy2(self.file_path, backup_path)
             print(f"バックアップを作成しました: {backup_path}")
         except PermissionError as e:
             print(f"バックアップ作成権限エラー: {e}")
@@ -0,0 +1,182 @@
+import csv
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def parse_stage(text: str) -> Tuple[float, float, float]:
+    """
+    "rate:duration" または "start-end:duration" 形式のステージ指定を解析する
+
+    Returns:
+        (開始レート, 終了レート, 継続秒数)
+
+    Example:
+        >>> parse_stage("5:30")
+        (5.0, 5.0, 30.0)
+        >>> parse_stage("5-20:60")
+        (5.0, 20.0, 60.0)
+    """
+    rate, duration = text.split(":", 1)
+    if "-" in rate:
+        start, end = rate.split("-", 1)
+    else:
+        start = end = rate
+    return float(start), float(end), float(duration)
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+class LoadGenerator:
+    """
+    オープンループ負荷生成器
+
+    応答を待たずに目標レートでリクエストを発行し、ステージごとにレートを保持・
+    ランプさせる。遅延は「本来送信すべきだった時刻」から計測するため、
+    サーバーが詰まった場合の待ち時間も結果に含まれる。
+    クライアント側のスケジューラ（ワーカー数・レート制限）・サーキットブレーカー・
+    エンドポイントの除外は通さず（ローカルで拒否した分が結果に混ざらないように）、
+    設定されたエンドポイントに順に送る。同時実行数は max_in_flight で制限する。
+    """
+
+    def __init__(self, client, format_option: str, patterns: Optional[List[str]] = None,
+                 max_in_flight: int = 64, interval: float = 1.0):
+        self.client = client
+        self.format_option = format_option
+        self.patterns = list(patterns or client.patterns)
+        self.max_in_flight = max_in_flight
+        self.interval = interval
+        self.urls = list(client.endpoints.endpoints)
+        self.records: List[Tuple[float, float, bool]] = []
+        self.lock = threading.Lock()
+
+    def _send(self, scheduled: float, origin: float, pattern: str, url: str) -> None:
+        ok = False
+        try:
+            result = self.client.run_direct(self.format_option, pattern, url)
+            ok = self._is_ok(result)
+        except Exception as e:
+            print(f"LoadGenerator error: {e}")
+        latency = time.monotonic() - scheduled
+        with self.lock:
+            self.records.append((scheduled - origin, latency, ok))
+
+    @staticmethod
+    def _is_ok(ret) -> bool:
+        if ret is None:
+            return False
+        result = ret.get("result", ret) if hasattr(ret, "get") else ret
+        if "error" in result:
+            return False
+        status = result.get("status_code")
+        return status is not None and status < 400
+
+    def run(self, stages: List[Tuple[float, float, float]]) -> Dict[str, Any]:
+        """
+        ステージを順に実行し、レポートを返す
+
+        Args:
+            stages: (開始レート, 終了レート, 継続秒数) のリスト
+        """
+        self.records = []
+        # 送信スレッドごとに接続を使い回せるよう、接続プールを同時実行数に合わせる
+        previous_pool = self.client.resize_pool(self.max_in_flight)
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="loadgen")
+        origin = time.monotonic()
+        stage_start = origin
+        sent = 0
+        try:
+            for start_rate, end_rate, duration in stages:
+                print(f"ステージ開始: {start_rate} -> {end_rate} req/s, {duration}秒")
+                stage_end = stage_start + duration
+                t = stage_start
+                while True:
+                    progress = (t - stage_start) / duration if duration > 0 else 1.0
+                    rate = start_rate + (end_rate - start_rate) * progress
+                    if rate <= 0:
+                        # レート0の区間は次の区間までスキップ
+                        t += self.interval
+                        if t >= stage_end:
+                            break
+                        continue
+                    if t >= stage_end:
+                        break
+                    delay = t - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pattern = self.patterns[sent % len(self.patterns)]
+                    executor.submit(self._send, t, origin, pattern, self.urls[sent % len(self.urls)])
+                    sent += 1
+                    t += 1.0 / rate
+                # 送信が無い区間も含めてステージの時間を保持する
+                delay = stage_end - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                stage_start = stage_end
+        finally:
+            executor.shutdown(wait=True)
+            self.client.resize_pool(previous_pool)
+        return self.report(time.monotonic() - origin)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        with self.lock:
+            records = sorted(self.records)
+        windows = []
+        # 送信予定時刻で時間窓に振り分け、達成RPSは完了時刻で数える
+        count = int(elapsed // self.interval) + 1
+        buckets: List[List[Tuple[float, float, bool]]] = [[] for _ in range(count)]
+        completed = [0] * count
+        for record in records:
+            buckets[min(count - 1, int(record[0] // self.interval))].append(record)
+            completed[min(count - 1, int((record[0] + record[1]) // self.interval))] += 1
+        for i, bucket in enumerate(buckets):
+            latencies = [r[1] for r in bucket]
+            errors = sum(1 for r in bucket if not r[2])
+            windows.append({
+                "t": round(i * self.interval, 3),
+                "requests": len(bucket),
+                "offered_rps": len(bucket) / self.interval,
+                "achieved_rps": completed[i] / self.interval,
+                "error_rate": errors / len(bucket) if bucket else 0.0,
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+            })
+        latencies = [r[1] for r in records]
+        errors = sum(1 for r in records if not r[2])
+        summary = {
+            "format": self.format_option,
+            "duration": elapsed,
+            "requests": len(records),
+            "rps": len(records) / elapsed if elapsed > 0 else 0.0,
+            "error_rate": errors / len(records) if records else 0.0,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+        }
+        return {"summary": summary, "windows": windows}
+
+    @staticmethod
+    def write_report(report: Dict[str, Any], path: str) -> None:
+        """
+        レポートを書き出す（拡張子 .csv なら時間窓ごとのCSV、それ以外はJSON）
+        """
+        path = Path(path)
+        if path.suffix.lower() == ".csv":
+            with open(path, "w", newline="", encoding="utf-8") as file:
+                writer = csv.DictWriter(file, fieldnames=list(report["windows"][0].keys()) if report["windows"] else ["t"])
+                writer.writeheader()
+                writer.writerows(report["windows"])
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f"レポートを書き出しました: {path}")
@@ -0,0 +1,92 @@
+from typing import Any, Dict, List, Optional
+
+# params_map のパターンに指定するページング設定のキー
+#   オフセット方式:
+#     "$pagination": {"type": "offset", "offset_param": "offset", "limit_param": "limit",
+#                     "limit": 100, "items": "items"}
+#   継続トークン方式:
+#     "$pagination": {"type": "token", "token_param": "pageToken", "next": "nextPageToken",
+#                     "items": "items"}
+# "$" で始まるキーは送信するパラメータには含めない。
+PAGINATION_KEY = "$pagination"
+RESERVED_PREFIX = "$"
+
+OFFSET = "offset"
+TOKEN = "token"
+
+
+def strip_reserved(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    "$" で始まる設定用のキーを除いたパラメータを返す
+    """
+    return {key: value for key, value in params.items() if not str(key).startswith(RESERVED_PREFIX)}
+
+
+def _lookup(data: Any, path: Optional[str]) -> Any:
+    """
+    "data.items" のようなドット区切りのパスで値を取り出す
+    """
+    if not path:
+        return data
+    for part in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+class PageSpec:
+    """
+    パターンのページング設定
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.type = spec.get("type", OFFSET)
+        if self.type not in (OFFSET, TOKEN):
+            raise ValueError(f"unknown pagination type: {self.type}")
+        self.offset_param = spec.get("offset_param", "offset")
+        self.limit_param = spec.get("limit_param", "limit")
+        self.limit = int(spec.get("limit", 100))
+        self.token_param = spec.get("token_param", "pageToken")
+        self.next = spec.get("next", "nextPageToken")
+        self.items_path = spec.get("items", "items")
+        self.max_pages = spec.get("max_pages")
+
+    @classmethod
+    def from_params(cls, params: Any) -> Optional["PageSpec"]:
+        if isinstance(params, dict) and isinstance(params.get(PAGINATION_KEY), dict):
+            return cls(params[PAGINATION_KEY])
+        return None
+
+    def page_params(self, base: Dict[str, Any], index: int = 0, token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        index ページ目（オフセット方式）または token のページ（トークン方式）のパラメータ
+        """
+        params = dict(base)
+        if self.type == OFFSET:
+            params[self.offset_param] = index * self.limit
+            params[self.limit_param] = self.limit
+        elif token is not None:
+            params[self.token_param] = token
+        return params
+
+    def items(self, result) -> List[Any]:
+        if 'error' in result:
+            return []
+        items = _lookup(result.json, self.items_path)
+        return items if isinstance(items, list) else []
+
+    def next_token(self, result) -> Optional[str]:
+        if 'error' in result:
+            return None
+        return _lookup(result.json, self.next) or None
+
+    def is_last(self, result) -> bool:
+        """
+        このページで終わりかどうか（エラー、または件数が limit 未満）
+        """
+        if 'error' in result or result.status_code >= 400:
+            return True
+        if self.type == OFFSET:
+            return len(self.items(result)) < self.limit
+        return self.next_token(result) is None
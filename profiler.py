@@ -0,0 +1,141 @@
+import cProfile
+import itertools
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+# 環境変数にプロファイルの出力先ディレクトリを指定すると有効になる
+PROFILE_ENV = "TKINTERX_PROFILE"
+
+
+class Profiler:
+    """
+    呼び出し単位のプロファイラ（オプトイン）
+
+    profile() で囲んだ処理を cProfile で計測し、1回ごとに .prof ファイルを
+    output_dir に書き出す。同じスレッドで入れ子になった profile() と section() は
+    外側のプロファイル内の区間（経過時間）として記録する。
+    無効時はほぼオーバーヘッドなしで素通りする。
+    """
+
+    def __init__(self, output_dir: Union[None, str, Path] = None, top_n: int = 15):
+        self.output_dir = None
+        self.top_n = top_n
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.seq = itertools.count(1)
+        # 名前ごとの直近のサマリー
+        self.summaries: Dict[str, str] = {}
+        self.configure(output_dir)
+
+    @property
+    def enabled(self) -> bool:
+        return self.output_dir is not None
+
+    def configure(self, output_dir: Union[None, str, Path], top_n: Optional[int] = None) -> None:
+        if top_n is not None:
+            self.top_n = top_n
+        if output_dir:
+            self.output_dir = Path(output_dir)
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            print(f"プロファイルを有効にしました: {self.output_dir}")
+        else:
+            self.output_dir = None
+
+    def _spans(self) -> Optional[List[Tuple[str, float]]]:
+        return getattr(self.local, "spans", None)
+
+    @contextmanager
+    def profile(self, name: str):
+        """
+        処理を計測し、プロファイルを書き出す
+        """
+        if not self.enabled:
+            yield
+            return
+        if self._spans() is not None:
+            # 既に計測中なら区間として記録するだけにする
+            with self.section(name):
+                yield
+            return
+
+        prof = cProfile.Profile()
+        spans: List[Tuple[str, float]] = []
+        self.local.spans = spans
+        try:
+            prof.enable()
+        except ValueError:
+            # 他のスレッドで計測中など、プロファイラを有効にできない場合は区間のみ記録する
+            prof = None
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if prof is not None:
+                prof.disable()
+            self.local.spans = None
+            self._finish(name, prof, elapsed, spans)
+
+    @contextmanager
+    def section(self, name: str):
+        """
+        計測中のプロファイルに区間の経過時間を記録する（計測中でなければ何もしない）
+        """
+        spans = self._spans() if self.enabled else None
+        if spans is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            spans.append((name, time.perf_counter() - started))
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """
+        func を profile(name) で囲んだ関数を返す
+        """
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.profile(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _finish(self, name: str, prof: Optional[cProfile.Profile], elapsed: float,
+                spans: List[Tuple[str, float]]) -> None:
+        lines = [f"[{name}] {elapsed * 1000:.1f} ms"]
+        for span_name, span_elapsed in spans:
+            lines.append(f"  {span_name}: {span_elapsed * 1000:.1f} ms")
+        if prof is not None:
+            stats = pstats.Stats(prof)
+            path = self.output_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{next(self.seq):04d}-{name}.prof"
+            try:
+                stats.dump_stats(str(path))
+            except OSError as e:
+                print(f"プロファイル書き出しエラー: {e}")
+            lines.append(f"  top {self.top_n} (tottime / cumtime / calls):")
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+            for (file, line, func), (cc, nc, tt, ct, callers) in rows[:self.top_n]:
+                lines.append(f"  {tt * 1000:8.1f} {ct * 1000:8.1f} {nc:6d}  {func} ({os.path.basename(file)}:{line})")
+        with self.lock:
+            self.summaries[name] = "\n".join(lines)
+
+    def summary(self) -> str:
+        """
+        直近のプロファイルのサマリー（名前ごと）を返す
+        """
+        with self.lock:
+            return "\n\n".join(self.summaries.values())
+
+
+_profiler = Profiler(os.environ.get(PROFILE_ENV))
+
+
+def get_profiler() -> Profiler:
+    return _profiler
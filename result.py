@@ -0,0 +1,169 @@
+import json
+from typing import Any, Dict, Iterator, Optional
+
+
+class Result:
+    """
+    レスポンス1件分の結果
+
+    本文はバイト列として1回だけ保持し、テキスト・解析済みJSON・整形済みJSONは
+    最初にアクセスされたときに生成してキャッシュする。
+    従来の辞書形式（result['status_code'] や ret['result']['json'] など）でも参照できる。
+
+    辞書キー:
+        status_code, headers, content, url, json, json_text, result（自分自身）
+        エラー時は error, json_text（空文字）, result のみ
+    """
+
+    __slots__ = ("status_code", "url", "error", "_raw", "_encoding", "_headers",
+                 "_text", "_json", "_json_loaded", "_json_text")
+
+    KEYS = ("status_code", "headers", "content", "url", "json", "json_text", "result")
+    ERROR_KEYS = ("error", "json_text", "result")
+
+    def __init__(self, status_code: Optional[int] = None, url: Optional[str] = None, raw: bytes = b"",
+                 encoding: Optional[str] = None, headers: Any = None, error: Optional[str] = None):
+        self.status_code = status_code
+        self.url = url
+        self.error = error
+        self._raw = raw
+        self._encoding = encoding
+        self._headers = headers if headers is not None else {}
+        self._text = None
+        self._json = None
+        self._json_loaded = False
+        self._json_text = None
+
+    @classmethod
+    def from_response(cls, response) -> "Result":
+        """
+        requests.Response から作成する（ヘッダーはコピーせず参照を保持する）
+        """
+        return cls(response.status_code, response.url, response.content,
+                   response.encoding, response.headers)
+
+    @classmethod
+    def from_json(cls, status_code: int, url: Optional[str], data: Any, headers: Any = None) -> "Result":
+        """
+        解析済みのデータから作成する（json は再解析せずそのまま使う）
+        """
+        result = cls(status_code, url, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'utf-8', headers)
+        result._json = data
+        result._json_loaded = True
+        return result
+
+    @classmethod
+    def from_error(cls, error_msg: str) -> "Result":
+        return cls(error=error_msg)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Result":
+        """
+        to_dict() の出力（または従来形式の辞書）から作成する
+        """
+        if 'error' in data:
+            return cls.from_error(data['error'])
+        content = data.get('content') or ""
+        return cls(data.get('status_code'), data.get('url'), content.encode('utf-8'),
+                   'utf-8', data.get('headers') or {})
+
+    @property
+    def raw(self) -> bytes:
+        return self._raw
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._raw.decode(self._encoding or 'utf-8', errors='replace')
+        return self._text
+
+    @property
+    def json(self) -> Any:
+        if not self._json_loaded:
+            try:
+                self._json = json.loads(self.text) if self._raw else None
+            except ValueError:
+                self._json = None
+            self._json_loaded = True
+        return self._json
+
+    @property
+    def json_text(self) -> str:
+        if self._json_text is None:
+            data = self.json
+            self._json_text = json.dumps(data, indent=2, ensure_ascii=False) if data else ""
+        return self._json_text
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return dict(self._headers)
+
+    @property
+    def raw_headers(self) -> Any:
+        """
+        コピーしていないヘッダー（requests の CaseInsensitiveDict など）
+        """
+        return self._headers
+
+    def preview(self, size: int = 200) -> str:
+        """
+        本文の先頭 size バイトをテキスト全体をデコードせずに返す
+        """
+        return self._raw[:size].decode(self._encoding or 'utf-8', errors='replace')
+
+    # --- 従来の辞書形式との互換 ---
+
+    def keys(self):
+        return self.ERROR_KEYS if self.error is not None else self.KEYS
+
+    def __contains__(self, key) -> bool:
+        return key in self.keys()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.keys():
+            raise KeyError(key)
+        if key == 'error':
+            return self.error
+        if key == 'content':
+            return self.text
+        if key == 'result':
+            return self
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSONに変換できる辞書を返す（json / json_text は本文から再生成できるため含めない）
+        """
+        if self.error is not None:
+            return {'error': self.error}
+        return {
+            'status_code': self.status_code,
+            'headers': self.headers,
+            'content': self.text,
+            'url': self.url,
+        }
+
+    def __str__(self) -> str:
+        if self.error is not None:
+            return f"エラー: {self.error}"
+        return f"ステータスコード: {self.status_code}\nURL: {self.url}\n\n{self.text}"
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f"Result(error={self.error!r})"
+        return f"Result(status_code={self.status_code}, url={self.url!r}, size={len(self._raw)})"
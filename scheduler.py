@@ -0,0 +1,271 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+# 優先度クラス（値が小さいほど先に処理される）
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+PRIORITIES = {
+    INTERACTIVE: 0,
+    BACKGROUND: 1,
+}
+
+
+class TokenBucket:
+    """
+    トークンバケット方式のレートリミッタ
+
+    rate 個/秒でトークンが補充され、最大 capacity 個まで貯まる。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """
+        トークンが1個使えるようになるまでの秒数を返す（0なら即時利用可能）
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1.0:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (1.0 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1.0
+
+
+class _Job:
+    __slots__ = ("rank", "seq", "priority", "endpoint", "fn", "args", "kwargs", "future", "enqueued")
+
+    def __init__(self, rank, seq, priority, endpoint, fn, args, kwargs):
+        self.rank = rank
+        self.seq = seq
+        self.priority = priority
+        self.endpoint = endpoint
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+    def __lt__(self, other):
+        return (self.rank, self.seq) < (other.rank, other.seq)
+
+
+class RequestScheduler:
+    """
+    優先度付きのリクエストスケジューラ
+
+    - 優先度クラス（interactive が background より先）ごとにキューイング
+    - background の同時実行は workers - reserved まで（interactive 用にワーカーを空けておく）
+    - エンドポイントごとのトークンバケットで送信レートを制限
+    - キューの深さ・待ち時間のメトリクスを収集
+
+    rate_limits の例（info3.json の "rate_limits"）:
+        {"default": {"rate": 1.0, "capacity": 5},
+         "https://script.google.com/...": {"rate": 0.5, "capacity": 2}}
+    設定がないエンドポイントは制限なしで送信する。
+    """
+
+    def __init__(self, workers: int = 4, rate_limits: Optional[Dict[str, Dict[str, float]]] = None,
+                 reserved: int = 1):
+        self.workers = max(1, int(workers))
+        # ワーカーが1つしかない場合は予約しない
+        self.background_limit = max(1, self.workers - max(0, int(reserved)))
+        self.running = {name: 0 for name in PRIORITIES}
+        self.rate_limits = dict(rate_limits or {})
+        self.buckets: Dict[str, Optional[TokenBucket]] = {}
+        self.queues: Dict[str, list] = {}
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.slots = threading.Semaphore(self.workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scheduler")
+        self.local = threading.local()
+        self.metrics = {
+            name: {"submitted": 0, "completed": 0, "queued": 0,
+                   "wait_total": 0.0, "wait_max": 0.0, "waits": deque(maxlen=1000)}
+            for name in PRIORITIES
+        }
+        self.closed = False
+        self.dispatcher = threading.Thread(target=self._dispatch_loop, name="scheduler-dispatcher", daemon=True)
+        self.dispatcher.start()
+
+    def _bucket(self, endpoint: str) -> Optional[TokenBucket]:
+        if endpoint not in self.buckets:
+            conf = self.rate_limits.get(endpoint) or self.rate_limits.get("default")
+            if conf:
+                rate = float(conf.get("rate", 1.0))
+                self.buckets[endpoint] = TokenBucket(rate, float(conf.get("capacity", max(1.0, rate))))
+            else:
+                self.buckets[endpoint] = None
+        return self.buckets[endpoint]
+
+    def submit(self, endpoint: str, priority: Union[str, int], fn: Callable, *args, **kwargs) -> Future:
+        """
+        ジョブをキューに積み、結果を受け取る Future を返す
+        """
+        name = self._priority_name(priority)
+        job = _Job(PRIORITIES[name], next(self.seq), name, endpoint, fn, args, kwargs)
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("scheduler is closed")
+            heapq.heappush(self.queues.setdefault(endpoint, []), job)
+            self.metrics[name]["submitted"] += 1
+            self.metrics[name]["queued"] += 1
+            self.cond.notify()
+        return job.future
+
+    def call(self, endpoint: str, priority: Union[str, int], fn: Callable, *args, **kwargs) -> Any:
+        """
+        ジョブを投入し、完了まで待って結果を返す
+
+        スケジューラのワーカー内から呼ばれた場合はデッドロックを避けるため直接実行する。
+        """
+        if getattr(self.local, "in_worker", False):
+            return fn(*args, **kwargs)
+        return self.submit(endpoint, priority, fn, *args, **kwargs).result()
+
+    def _priority_name(self, priority: Union[str, int]) -> str:
+        if isinstance(priority, int):
+            for name, rank in PRIORITIES.items():
+                if rank == priority:
+                    return name
+        elif priority in PRIORITIES:
+            return priority
+        raise ValueError(f"unknown priority: {priority}")
+
+    def _next_job(self) -> Optional[_Job]:
+        """
+        トークンが使えるエンドポイントのうち、最も優先度の高いジョブを取り出す。
+        無ければ次に使えるようになるまでの秒数を self.cond で待つ。
+        呼び出し時は self.cond を保持していること。
+        """
+        while not self.closed:
+            now = time.monotonic()
+            best = None
+            wait = None
+            for endpoint, queue in self.queues.items():
+                if not queue:
+                    continue
+                if queue[0].priority == BACKGROUND and self.running[BACKGROUND] >= self.background_limit:
+                    # 予約したワーカーは interactive にだけ使う（完了時に通知される）
+                    continue
+                bucket = self._bucket(endpoint)
+                delay = bucket.delay(now) if bucket is not None else 0.0
+                if delay > 0:
+                    wait = delay if wait is None else min(wait, delay)
+                    continue
+                if best is None or queue[0] < best[0]:
+                    best = queue
+            if best is not None:
+                job = heapq.heappop(best)
+                bucket = self._bucket(job.endpoint)
+                if bucket is not None:
+                    bucket.take()
+                return job
+            self.cond.wait(timeout=wait)
+        return None
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            # 空きワーカーが出るまで取り出さない（executor 側で FIFO に並ばないように）
+            self.slots.acquire()
+            with self.cond:
+                job = self._next_job()
+                if job is None:
+                    self.slots.release()
+                    return
+                waited = time.monotonic() - job.enqueued
+                self.running[job.priority] += 1
+                m = self.metrics[job.priority]
+                m["queued"] -= 1
+                m["wait_total"] += waited
+                m["wait_max"] = max(m["wait_max"], waited)
+                m["waits"].append(waited)
+            self.executor.submit(self._run_job, job)
+
+    def _run_job(self, job: _Job) -> None:
+        self.local.in_worker = True
+        try:
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.fn(*job.args, **job.kwargs))
+                except BaseException as e:
+                    job.future.set_exception(e)
+        finally:
+            self.local.in_worker = False
+            with self.cond:
+                self.metrics[job.priority]["completed"] += 1
+                self.running[job.priority] -= 1
+                self.cond.notify()
+            self.slots.release()
+
+    def pressure(self, endpoint: str) -> Tuple[int, float]:
+        """
+        エンドポイントのキューの深さと、次に積んだジョブがトークンを得るまでの秒数を返す
+        """
+        with self.cond:
+            queued = len(self.queues.get(endpoint) or ())
+            bucket = self._bucket(endpoint)
+            if bucket is None:
+                return queued, 0.0
+            bucket.delay()
+            deficit = queued + 1 - bucket.tokens
+            if deficit <= 0:
+                return queued, 0.0
+            return queued, deficit / bucket.rate if bucket.rate > 0 else float("inf")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        優先度クラスごとのキュー深さ・待ち時間とバケットの残トークンを返す
+        """
+        with self.cond:
+            ret = {"priorities": {}, "endpoints": {}}
+            for name, m in self.metrics.items():
+                waits = sorted(m["waits"])
+                started = m["submitted"] - m["queued"]
+                ret["priorities"][name] = {
+                    "submitted": m["submitted"],
+                    "completed": m["completed"],
+                    "queue_depth": m["queued"],
+                    "wait_avg": m["wait_total"] / started if started else 0.0,
+                    "wait_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                    "wait_max": m["wait_max"],
+                }
+            for endpoint, queue in self.queues.items():
+                bucket = self._bucket(endpoint)
+                if bucket is not None:
+                    bucket.delay()
+                ret["endpoints"][endpoint] = {
+                    "queue_depth": len(queue),
+                    "tokens": bucket.tokens if bucket is not None else None,
+                }
+            return ret
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+            for queue in self.queues.values():
+                for job in queue:
+                    job.future.cancel()
+                queue.clear()
+        self.slots.release()
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,286 @@
+import http.client
+import json
+import os
+import socket
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from scheduler import INTERACTIVE, BACKGROUND, PRIORITIES
+
+
+def _to_json(result) -> Optional[Dict[str, Any]]:
+    return result.to_dict() if result is not None else None
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    常駐サービスのリクエストハンドラ（JSON over HTTP）
+
+    GET  /patterns  フォーマットとパターンの一覧
+    GET  /stats     スケジューラとエンドポイントの統計
+    POST /run       {"format": ..., "pattern": ..., "priority": "interactive"}
+    POST /batch     {"format": ..., "patterns": [...], "priority": "background"}
+    POST /sweep     {"format": ..., "pattern": ..., "start": 0, "limit": null}
+                    （1件ごとに {"params": ..., "result": ...} の行をストリームで返す）
+    POST /pages     {"format": ..., "pattern": ..., "prefetch": null, "max_pages": null}
+                    （1ページごとに {"page": n, "result": ...} の行をストリームで返す）
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "tkinterx-service/1.0"
+    # 小さな応答が遅延ACK待ちにならないようにする（Unixソケットでは UnixServiceHandler で無効にする）
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # 1リクエストごとのログ出力は行わない
+        pass
+
+    def _send_json(self, status: int, body: Any) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_ndjson(self, rows) -> None:
+        """
+        rows を1行1JSONのチャンク形式で、生成されたものから順に送信する
+
+        最初の行はヘッダーを送る前に取り出すため、生成時の入力エラーは通常の
+        エラー応答になる。送信を始めた後のエラーは {"error": ...} の行として送り、
+        チャンク形式の本文を正しく終える。
+        """
+        rows = iter(rows)
+        first = next(rows, None)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if first is not None:
+            self._write_row(first)
+            try:
+                for row in rows:
+                    self._write_row(row)
+            except Exception as e:
+                self._write_row({"error": f"予期しないエラー: {e}"})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_row(self, row: Any) -> None:
+        data = json.dumps(row, ensure_ascii=False).encode('utf-8') + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def _check_stream(self, client, body: Dict[str, Any]) -> None:
+        """
+        ストリームで返すリクエストの format / pattern / priority を、ヘッダーを送る前に検証する
+        """
+        if not client.formats or body.get("format") not in client.formats:
+            raise ValueError(f"unknown format: {body.get('format')}")
+        if body.get("pattern") not in (client.patterns or []):
+            raise ValueError(f"unknown pattern: {body.get('pattern')}")
+        if body.get("priority", BACKGROUND) not in PRIORITIES:
+            raise ValueError(f"unknown priority: {body.get('priority')}")
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def do_GET(self):
+        client = self.server.client
+        if self.path == "/patterns":
+            self._send_json(200, {"formats": client.formats, "patterns": client.patterns})
+        elif self.path == "/stats":
+            self._send_json(200, {
+                "scheduler": client.scheduler.stats(),
+                "endpoints": client.endpoint_stats(),
+                "uptime": time.monotonic() - self.server.started,
+            })
+        else:
+            self._send_json(404, {"error": f"not found: {self.path}"})
+
+    def do_POST(self):
+        client = self.server.client
+        try:
+            body = self._read_json()
+        except ValueError as e:
+            self._send_json(400, {"error": f"JSONの解析エラー: {e}"})
+            return
+        try:
+            if self.path == "/run":
+                result = client.run(body.get("format"), body.get("pattern"), priority=body.get("priority", INTERACTIVE))
+                self._send_json(200, {"result": _to_json(result)})
+            elif self.path == "/batch":
+                results = client.run_batch(body.get("format"), body.get("patterns") or [],
+                                           priority=body.get("priority", BACKGROUND))
+                self._send_json(200, {"results": [_to_json(result) for result in results]})
+            elif self.path == "/sweep":
+                self._check_stream(client, body)
+                rows = client.run_sweep(body.get("format"), body.get("pattern"),
+                                        priority=body.get("priority", BACKGROUND),
+                                        start=body.get("start", 0), limit=body.get("limit"))
+                self._send_ndjson({"params": params, "result": _to_json(result)} for params, result in rows)
+            elif self.path == "/pages":
+                self._check_stream(client, body)
+                pages = client.iter_pages(body.get("format"), body.get("pattern"), prefetch=body.get("prefetch"),
+                                          priority=body.get("priority", BACKGROUND), max_pages=body.get("max_pages"))
+                self._send_ndjson({"page": n, "result": _to_json(result)} for n, result in enumerate(pages, 1))
+            else:
+                self._send_json(404, {"error": f"not found: {self.path}"})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": f"予期しないエラー: {e}"})
+
+
+class UnixServiceHandler(ServiceHandler):
+    # AF_UNIX のソケットには TCP_NODELAY を設定できない
+    disable_nagle_algorithm = False
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler が client_address[0] を参照するためダミーを返す
+        return request, ("unix", 0)
+
+
+class Service:
+    """
+    1つのClientを共有する常駐ローカルサービス
+
+    Client（設定の読み込み・接続プール・スケジューラ）は起動時に1回だけ作られ、
+    呼び出し側は起動コストを払わずにHTTPまたはUnixソケット経由で run / batch を呼べる。
+    """
+
+    def __init__(self, client, host: str = "127.0.0.1", port: int = 8765, socket_path: Optional[str] = None):
+        self.client = client
+        self.socket_path = socket_path
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self.httpd = UnixHTTPServer(socket_path, UnixServiceHandler)
+        else:
+            self.httpd = ThreadingHTTPServer((host, port), ServiceHandler)
+        self.httpd.client = client
+        self.httpd.started = time.monotonic()
+
+    @property
+    def address(self) -> str:
+        if self.socket_path:
+            return f"unix:{self.socket_path}"
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        print(f"サービスを開始しました: {self.address}")
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        self.httpd.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        print("サービスを停止しました")
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class _TCPHTTPConnection(http.client.HTTPConnection):
+    def connect(self):
+        super().connect()
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class ServiceClient:
+    """
+    常駐サービスを呼び出すための軽量クライアント（標準ライブラリのみで接続を維持する）
+
+    Example:
+        >>> service = ServiceClient(port=8765)
+        >>> service.run("get", "pattern1")["status_code"]
+        200
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, socket_path: Optional[str] = None,
+                 timeout: Optional[float] = None):
+        if socket_path:
+            self.conn = _UnixHTTPConnection(socket_path, timeout=timeout)
+        else:
+            self.conn = _TCPHTTPConnection(host, port, timeout=timeout)
+
+    def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Any:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        self.conn.request(method, path, body=data, headers=headers)
+        response = self.conn.getresponse()
+        return json.loads(response.read())
+
+    def run(self, format_option: str, pattern_option: str, priority: str = INTERACTIVE):
+        return self._request("POST", "/run", {"format": format_option, "pattern": pattern_option,
+                                              "priority": priority})["result"]
+
+    def batch(self, format_option: str, patterns, priority: str = BACKGROUND):
+        return self._request("POST", "/batch", {"format": format_option, "patterns": list(patterns),
+                                                "priority": priority})["results"]
+
+    def sweep(self, format_option: str, pattern_option: str, start: int = 0, limit: Optional[int] = None,
+              priority: str = BACKGROUND):
+        """
+        スイープの結果を届いた順に (params, result) で返すジェネレータ
+        """
+        for row in self._stream("/sweep", {"format": format_option, "pattern": pattern_option, "start": start,
+                                           "limit": limit, "priority": priority}):
+            yield row["params"], row["result"]
+
+    def pages(self, format_option: str, pattern_option: str, prefetch: Optional[int] = None,
+              max_pages: Optional[int] = None, priority: str = BACKGROUND):
+        """
+        ページングされた結果を届いた順に返すジェネレータ
+        """
+        for row in self._stream("/pages", {"format": format_option, "pattern": pattern_option, "prefetch": prefetch,
+                                           "max_pages": max_pages, "priority": priority}):
+            yield row["result"]
+
+    def _stream(self, path: str, body: Dict[str, Any]):
+        """
+        NDJSON の行を届いた順に返す（エラー応答・エラー行は例外にする）
+        """
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.conn.request("POST", path, body=data, headers={"Content-Type": "application/json"})
+        response = self.conn.getresponse()
+        if response.status != 200:
+            error = json.loads(response.read()).get("error")
+            raise ValueError(f"{path}: {response.status} {error}")
+        for line in response:
+            row = json.loads(line)
+            if "error" in row:
+                raise RuntimeError(f"{path}: {row['error']}")
+            yield row
+
+    def stats(self):
+        return self._request("GET", "/stats")
+
+    def patterns(self):
+        return self._request("GET", "/patterns")
+
+    def close(self) -> None:
+        self.conn.close()
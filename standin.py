@@ -0,0 +1,202 @@
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+import envelope
+
+
+def echo(pattern: Optional[str], params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    既定の応答: 受け取ったパラメータをそのまま返す
+    """
+    return {"pattern": pattern, "params": params}
+
+
+def paged(total: int = 1000, default_limit: int = 100) -> Callable[[Optional[str], Dict[str, Any]], Any]:
+    """
+    offset/limit と pageToken の両方に対応した、total 件のデータを返すハンドラを作る
+    """
+    def handler(pattern: Optional[str], params: Dict[str, Any]) -> Dict[str, Any]:
+        limit = int(params.get("limit", default_limit))
+        offset = int(params.get("pageToken") or params.get("offset") or 0)
+        end = min(total, offset + limit)
+        return {"items": list(range(offset, end)), "nextPageToken": str(end) if end < total else None}
+    return handler
+
+
+class SyncSource:
+    """
+    params_map の差分同期（sync.py）の配信元
+
+    パターンごとに更新したバージョンを持ち、since より後に変わったものだけを返す。
+    """
+
+    def __init__(self, params_map: Optional[Dict[str, Any]] = None):
+        self.version = 0
+        self.params_map: Dict[str, Any] = {}
+        self.modified: Dict[str, int] = {}
+        self.removed: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        for pattern, params in (params_map or {}).items():
+            self.set(pattern, params)
+
+    def set(self, pattern: str, params: Any) -> None:
+        with self.lock:
+            self.version += 1
+            self.params_map[pattern] = params
+            self.modified[pattern] = self.version
+            self.removed.pop(pattern, None)
+
+    def remove(self, pattern: str) -> None:
+        with self.lock:
+            if pattern not in self.params_map:
+                return
+            del self.params_map[pattern]
+            self.version += 1
+            self.modified.pop(pattern, None)
+            self.removed[pattern] = self.version
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def delta(self, since: Optional[str]) -> Dict[str, Any]:
+        with self.lock:
+            if since is None:
+                return {"version": self.version, "changed": dict(self.params_map), "removed": [], "full": True}
+            since = int(since)
+            return {
+                "version": self.version,
+                "changed": {pattern: self.params_map[pattern] for pattern, v in self.modified.items() if v > since},
+                "removed": [pattern for pattern, v in self.removed.items() if v > since],
+                "full": False,
+            }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Any) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        query = urllib.parse.urlsplit(self.path).query
+        params = {key: values[-1] for key, values in urllib.parse.parse_qs(query).items()}
+        self.server.requests += 1
+        source = self.server.sync_source
+        if source is not None and urllib.parse.urlsplit(self.path).path == "/sync":
+            self._send_sync(source, params.get("since"))
+            return
+        self._send_json(200, self.server.handle(None, params))
+
+    def _send_sync(self, source: SyncSource, since: Optional[str]) -> None:
+        etag = source.etag
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        data = json.dumps(source.delta(since), ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length)
+        self.server.requests += 1
+        if self.server.max_body is not None and length > self.server.max_body:
+            self._send_json(413, {"error": f"payload too large: {length} > {self.server.max_body}"})
+            return
+        if "application/x-www-form-urlencoded" in (self.headers.get("Content-Type") or ""):
+            params = {key: values[-1] for key, values in urllib.parse.parse_qs(data.decode('utf-8')).items()}
+            self._send_json(200, self.server.handle(None, params))
+            return
+        try:
+            body = json.loads(data) if data else {}
+        except ValueError as e:
+            self._send_json(400, {"error": f"invalid json: {e}"})
+            return
+        if isinstance(body, dict) and envelope.BATCH_KEY in body:
+            results = []
+            for item in body[envelope.BATCH_KEY]:
+                try:
+                    results.append({"status": 200, "body": self.server.handle(item.get("pattern"), item.get("params"))})
+                except Exception as e:
+                    results.append({"status": 500, "error": str(e)})
+            self._send_json(200, {envelope.RESULTS_KEY: results})
+            return
+        self._send_json(200, self.server.handle(None, body))
+
+
+class StandIn:
+    """
+    Apps Script のデプロイの代わりに使うローカルのスタンドインサーバー
+
+    GET / POST（json・form）に加え、バッチエンベロープのプロトコルを実装する。
+    info3.json の "urls" に url を指定すると、ネットワークに出ずに動作を確認できる
+    （送信先は Client の作成時に "urls" から決まるため、作成後に client.url を変えても効かない）。
+    sync_source を渡すと sync_url で params_map の差分同期を配信する。
+
+    Example:
+        >>> with StandIn(max_body=1024) as standin:
+        ...     json.dump({"format": ["post_json"], "urls": [standin.url], "envelope": {}}, open("info3.json", "w"))
+        ...     client = Client("info3.json", "params_map.json")
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, max_body: Optional[int] = None,
+                 handler: Callable[[Optional[str], Dict[str, Any]], Any] = echo,
+                 sync_source: Optional[SyncSource] = None):
+        self.httpd = ThreadingHTTPServer((host, port), StandInHandler)
+        self.httpd.sync_source = sync_source
+        self.httpd.max_body = max_body
+        self.httpd.handle = handler
+        self.httpd.requests = 0
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/exec"
+
+    @property
+    def sync_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/sync"
+
+    @property
+    def requests(self) -> int:
+        """
+        受け付けたHTTPリクエストの数
+        """
+        return self.httpd.requests
+
+    def start(self) -> "StandIn":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
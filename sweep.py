@@ -0,0 +1,95 @@
+import math
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# params_map のフィールドに指定できるテンプレート
+#   {"$range": [start, stop, step]}  start から stop 未満まで（step は省略可）
+#   {"$list": [v1, v2, ...]}         列挙した値
+# テンプレートのフィールドが複数ある場合はすべての組み合わせ（直積）に展開される。
+RANGE = "$range"
+LIST = "$list"
+TEMPLATE_KEYS = (RANGE, LIST)
+
+
+class _NumberRange(Sequence):
+    """
+    小数にも対応した range（値は添字から計算し、リストは作らない）
+    """
+
+    def __init__(self, start, stop=None, step=1):
+        if stop is None:
+            start, stop = 0, start
+        if step == 0:
+            raise ValueError("$range step must not be 0")
+        self.start = start
+        self.step = step
+        self.length = max(0, math.ceil((stop - start) / step))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int):
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        return self.start + index * self.step
+
+
+def is_template(value: Any) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and next(iter(value)) in TEMPLATE_KEYS
+
+
+def is_sweep(params: Any) -> bool:
+    """
+    params にテンプレートのフィールドが含まれるかどうか
+    """
+    return isinstance(params, dict) and any(is_template(value) for value in params.values())
+
+
+def _values(spec: Dict[str, Any]) -> Sequence:
+    key, arg = next(iter(spec.items()))
+    if key == RANGE:
+        args = arg if isinstance(arg, list) else [arg]
+        if all(isinstance(a, int) for a in args):
+            return range(*args)
+        return _NumberRange(*args)
+    return arg
+
+
+class Sweep:
+    """
+    テンプレート付きのパラメータを具体的なパラメータ辞書に遅延展開する
+
+    組み合わせは添字から混合基数で都度計算するため、展開結果を保持せず、
+    数百万通りのスイープでもメモリ使用量は一定。途中の添字から再開することもできる。
+    """
+
+    def __init__(self, params: Dict[str, Any]):
+        self.order = list(params.keys())
+        self.fixed = {key: value for key, value in params.items() if not is_template(value)}
+        self.fields: List[str] = [key for key, value in params.items() if is_template(value)]
+        self.axes: List[Sequence] = [_values(params[key]) for key in self.fields]
+
+    def __len__(self) -> int:
+        total = 1
+        for axis in self.axes:
+            total *= len(axis)
+        return total
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        """
+        index 番目の組み合わせを返す（最後のフィールドが最も速く変化する）
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        chosen = {}
+        for key, axis in zip(reversed(self.fields), reversed(self.axes)):
+            index, digit = divmod(index, len(axis))
+            chosen[key] = axis[digit]
+        return {key: chosen[key] if key in chosen else self.fixed[key] for key in self.order}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter()
+
+    def iter(self, start: int = 0, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        end = len(self) if limit is None else min(len(self), start + limit)
+        for index in range(start, end):
+            yield self[index]
@@ -0,0 +1,127 @@
+"""
+params_map の差分同期
+
+プロトコル:
+    GET <sync_url>?since=<version>   （初回は since なし）
+    ヘッダー If-None-Match: <前回の ETag>
+
+    304: 変更なし
+    200: {"version": "...",
+          "changed": {"pattern": {...params...}, ...},   追加・変更されたパターン
+          "removed": ["pattern", ...],                   削除されたパターン
+          "full": false}                                 true の場合 changed が全パターン
+
+version と ETag は <params_map のパス>.sync.json に保存し、次回の同期で送る。
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+
+from jsonfilemanager import JSONFileManager
+
+
+class ParamsSync:
+    """
+    リモートのパターン定義を差分で取得し、Info.params_map とパターン一覧をその場で更新する
+    """
+
+    def __init__(self, info, url: str, session: Optional[requests.Session] = None, timeout: float = 30):
+        """
+        Args:
+            info: 更新する Info（params_map と patterns を持つ）
+            url: 同期用のエンドポイント
+            session: 使い回す requests.Session（省略時は新規作成）
+            timeout: タイムアウト時間（秒）
+        """
+        self.info = info
+        self.url = url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        params_path = Path(info.params_jsfm.file_path)
+        self.state_jsfm = JSONFileManager(params_path.with_name(params_path.name + '.sync.json'))
+        self.state = (self.state_jsfm.load() if self.state_jsfm.exists() else None) or {}
+
+    def sync(self) -> Dict[str, Any]:
+        """
+        差分を取得して反映する
+
+        Returns:
+            dict: {"status": "unchanged" | "updated" | "error", "changed": 件数, "removed": 件数, ...}
+        """
+        headers = {'User-Agent': 'Python-GET-Client/1.0'}
+        params = {}
+        if self.state.get("version") is not None:
+            params["since"] = self.state["version"]
+        if self.state.get("etag"):
+            headers["If-None-Match"] = self.state["etag"]
+
+        try:
+            response = self.session.get(self.url, params=params, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            error_msg = f"同期リクエストエラー: {str(e)}"
+            print(error_msg)
+            return {"status": "error", "error": error_msg}
+
+        if response.status_code == 304:
+            print("パターン定義に変更はありません")
+            return {"status": "unchanged", "changed": 0, "removed": 0, "version": self.state.get("version")}
+        if response.status_code != 200:
+            error_msg = f"同期エラー: ステータスコード {response.status_code}"
+            print(error_msg)
+            return {"status": "error", "error": error_msg}
+
+        try:
+            delta = response.json()
+        except ValueError as e:
+            error_msg = f"同期レスポンスの解析エラー: {e}"
+            print(error_msg)
+            return {"status": "error", "error": error_msg}
+
+        ret = self.apply(delta)
+        if ret["status"] == "error":
+            # params_map.json に書き込めなかった場合は、次回も同じ差分を受け取れるよう位置を進めない
+            return ret
+        self.state = {"version": delta.get("version"), "etag": response.headers.get("ETag")}
+        self.state_jsfm.write(self.state, create_backup=False)
+        return ret
+
+    def apply(self, delta: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        差分を params_map とパターン一覧に反映し、ファイルに書き込む
+
+        params_map・patterns は同じオブジェクトのまま更新するため、
+        Client や UI が保持している参照にもそのまま反映される。
+        """
+        info = self.info
+        if info.params_map is None:
+            info.params_map = {}
+            info.params_jsfm.data = info.params_map
+        if info.patterns is None:
+            info.patterns = []
+        params_map = info.params_map
+        patterns = info.patterns
+
+        changed = delta.get("changed") or {}
+        removed = set(delta.get("removed") or ())
+        if delta.get("full"):
+            # 全件が送られてきた場合は、含まれていないパターンを削除する
+            removed |= set(params_map) - set(changed)
+
+        added = [pattern for pattern in changed if pattern not in params_map]
+        params_map.update(changed)
+        for pattern in removed:
+            params_map.pop(pattern, None)
+
+        if removed:
+            patterns[:] = [pattern for pattern in patterns if pattern not in removed]
+        patterns.extend(pattern for pattern in added if pattern not in removed)
+
+        if (changed or removed) and not info.params_jsfm.write(params_map):
+            error_msg = f"同期した params_map を書き込めませんでした: {info.params_jsfm.file_path}"
+            print(error_msg)
+            return {"status": "error", "error": error_msg}
+        print(f"パターン定義を同期しました: 追加 {len(added)} 変更 {len(changed) - len(added)} 削除 {len(removed)}")
+        return {"status": "updated", "added": len(added), "changed": len(changed), "removed": len(removed),
+                "version": delta.get("version")}
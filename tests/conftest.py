@@ -0,0 +1,31 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# モジュールはリポジトリ直下にあるため、テストから import できるようにする
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from client import Client
+
+
+@pytest.fixture
+def make_client(tmp_path):
+    """
+    info3.json と params_map.json を tmp_path に書き出して Client を作る
+    """
+    clients = []
+
+    def make(info, params_map):
+        format_path = tmp_path / "info3.json"
+        params_path = tmp_path / "params_map.json"
+        format_path.write_text(json.dumps(info), encoding="utf-8")
+        params_path.write_text(json.dumps(params_map), encoding="utf-8")
+        client = Client(format_path=str(format_path), params_path=str(params_path))
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.scheduler.shutdown()
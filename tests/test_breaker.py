@@ -0,0 +1,82 @@
+import time
+
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyTracker
+from endpoints import EndpointPool
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record(False)
+    assert breaker.state == CLOSED
+    breaker.record(True)
+    for _ in range(3):
+        breaker.record(False)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert 0 < breaker.retry_after() <= 60
+
+
+def test_breaker_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05, half_open_probes=1)
+    breaker.record(False)
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    # 試験送信は1件だけ許可し、結果待ちの間 retry_after は 0
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.retry_after() == 0.0
+
+    # 試験送信が失敗すれば open に戻る
+    breaker.record(False)
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_latency_tracker_uses_max_read_until_enough_samples():
+    tracker = LatencyTracker(connect=1.0, min_read=0.2, max_read=10.0, min_samples=3)
+    tracker.record("k", 0.01)
+    assert tracker.timeout("k") == (1.0, 10.0)
+    for _ in range(2):
+        tracker.record("k", 0.01)
+    assert tracker.timeout("k") == (1.0, 0.2)
+    tracker.record("k", 1.0)
+    assert tracker.timeout("k") == (1.0, 2.0)
+
+
+def test_latency_tracker_doubles_after_timeouts():
+    tracker = LatencyTracker(min_read=0.2, max_read=5.0, multiplier=2.0, min_samples=3, window=200)
+    for _ in range(100):
+        tracker.record("k", 0.2)
+    assert tracker.timeout("k")[1] == 0.4
+
+    tracker.record_timeout("k", 0.4)
+    first = tracker.timeout("k")[1]
+    tracker.record_timeout("k", first)
+    second = tracker.timeout("k")[1]
+    assert 0.4 < first < second
+    for _ in range(10):
+        tracker.record_timeout("k", second)
+    assert tracker.timeout("k")[1] == 5.0
+    assert tracker.probe_timeout()[1] == 5.0
+
+    # 成功すれば倍々の延長は解除される（タイムアウトしたサンプルは window に残る）
+    tracker.record("k", 0.2)
+    assert "k" not in tracker.timeouts
+
+
+def test_defer_while_probe_in_flight_waits_for_report():
+    pool = EndpointPool(["a", "b"], cooldown=30.0, probe_timeout=60.0)
+    pool.defer("a", 0.0)
+    assert all(pool.pick() == "b" for _ in range(20))
+    # 試験送信が成功すれば待たずに復帰する
+    pool.report("a", 0.01, True)
+    assert not pool.stats()[0]["ejected"]
+
+    pool.defer("b", 2.0)
+    assert 0 < pool.stats()[1]["ejected_for"] <= 2.0
@@ -0,0 +1,78 @@
+import time
+from collections import Counter
+
+from endpoints import EndpointPool, EndpointStats
+from scheduler import RequestScheduler
+
+
+def _pool(latencies, **kwargs):
+    pool = EndpointPool(list(latencies), **kwargs)
+    for url, latency in latencies.items():
+        pool.report(url, latency, True)
+    return pool
+
+
+def test_pick_spreads_load_by_inverse_score():
+    pool = _pool({"a": 0.50, "b": 0.55})
+    counts = Counter(pool.pick() for _ in range(3000))
+    # 少し遅いだけのデプロイにも送る（スコアの逆数に比例）
+    assert 1200 < counts["b"] < 1650
+    assert counts["a"] > counts["b"]
+
+
+def test_pick_prefers_unmeasured_endpoint():
+    pool = _pool({"a": 0.1})
+    pool.endpoints["b"] = EndpointStats("b")
+    assert pool.pick() == "b"
+
+
+def test_stale_error_rate_decays():
+    pool = _pool({"a": 0.1, "b": 0.1}, half_life=1.0, eject_after=100)
+    for _ in range(10):
+        pool.report("b", 0.1, False)
+    fresh = Counter(pool.pick() for _ in range(2000))["b"]
+    # 最後の report から時間が経ったことにする
+    pool.endpoints["b"].updated -= 10.0
+    stale = Counter(pool.pick() for _ in range(2000))["b"]
+    assert fresh < 500
+    assert stale > 800
+
+
+def test_pick_avoids_endpoint_waiting_for_tokens():
+    scheduler = RequestScheduler(workers=1, rate_limits={"a": {"rate": 0.1, "capacity": 1}})
+    try:
+        pool = _pool({"a": 0.1, "b": 0.2}, load=scheduler.pressure)
+        scheduler.submit("a", "background", time.sleep, 0).result()
+        # a のトークンが尽きて補充まで約10秒かかるため、b に送る
+        counts = Counter(pool.pick() for _ in range(1000))
+        assert counts["b"] > 950
+    finally:
+        scheduler.shutdown()
+
+
+def test_pick_accounts_for_queue_depth():
+    depth = {"a": 20, "b": 0}
+    pool = _pool({"a": 0.1, "b": 0.2}, load=lambda url: (depth[url], 0.0))
+    counts = Counter(pool.pick() for _ in range(1000))
+    assert counts["b"] > 800
+
+
+def test_ejected_endpoint_is_probed_after_cooldown():
+    pool = _pool({"a": 0.1, "b": 0.1}, eject_after=1, cooldown=0.05)
+    pool.report("a", 0.1, False)
+    assert all(pool.pick() == "b" for _ in range(20))
+    time.sleep(0.06)
+    assert pool.pick() == "a"
+    # 試験送信中は他に送り、成功すれば復帰する
+    assert pool.pick() == "b"
+    pool.report("a", 0.1, True)
+    assert not pool.stats()[0]["ejected"]
+
+
+def test_released_probe_is_retried():
+    pool = _pool({"a": 0.1, "b": 0.1}, eject_after=1, cooldown=0.01)
+    pool.report("a", 0.1, False)
+    time.sleep(0.02)
+    assert pool.pick() == "a"
+    pool.release("a")
+    assert pool.pick() == "a"
@@ -0,0 +1,78 @@
+import envelope
+from result import Result
+from standin import StandIn
+
+
+def _entries(count, size=0):
+    return [(i, f"p{i}", {"n": i, "pad": "x" * size}) for i in range(count)]
+
+
+def test_pack_and_demux_keep_order():
+    chunk = _entries(3)
+    packed = envelope.pack(chunk)
+    assert [item["pattern"] for item in packed[envelope.BATCH_KEY]] == ["p0", "p1", "p2"]
+
+    body = {envelope.RESULTS_KEY: [
+        {"status": 200, "body": {"n": 0}},
+        {"status": 500, "error": "boom"},
+        {"status": 201, "body": {"n": 2}},
+    ]}
+    results = envelope.demux(Result.from_json(200, "http://stand-in/exec", body), chunk)
+    assert results[0].status_code == 200 and results[0].json == {"n": 0}
+    assert results[1]["error"] == "boom"
+    assert results[2].status_code == 201 and results[2].json == {"n": 2}
+
+
+def test_demux_rejects_mismatched_response():
+    chunk = _entries(2)
+    body = {envelope.RESULTS_KEY: [{"status": 200, "body": {}}]}
+    results = envelope.demux(Result.from_json(200, "http://stand-in/exec", body), chunk)
+    assert len(results) == 2
+    assert all('error' in result for result in results)
+
+    results = envelope.demux(Result.from_error("down"), chunk)
+    assert [result["error"] for result in results] == ["down", "down"]
+
+
+def test_split_respects_limit_and_max_items():
+    entries = _entries(10, size=50)
+    sizer = envelope.EnvelopeSizer(limit=300, max_items=3)
+    chunks = list(envelope.split(entries, sizer))
+    assert [entry for chunk in chunks for entry in chunk] == entries
+    for chunk in chunks:
+        assert len(chunk) <= 3
+        assert len(chunk) == 1 or sum(envelope.entry_size(p, params) for _, p, params in chunk) <= 300
+
+
+def test_split_puts_oversized_entry_alone():
+    entries = _entries(1, size=10) + [(1, "big", {"pad": "x" * 1000})] + _entries(1, size=10)
+    chunks = list(envelope.split(entries, envelope.EnvelopeSizer(limit=200)))
+    assert [len(chunk) for chunk in chunks] == [1, 1, 1]
+
+
+def test_413_shrinks_and_resplits(make_client):
+    params_map = {f"p{i}": {"n": i, "pad": "x" * 80} for i in range(16)}
+    with StandIn(max_body=600) as standin:
+        client = make_client({"format": ["post_json"], "urls": [standin.url],
+                              "envelope": {"limit": 8192, "floor": 256}}, params_map)
+        results = client.run_batch("post_json", list(params_map))
+        assert client.envelope.limit < 8192
+        assert standin.requests > 1
+    for pattern, result in zip(params_map, results):
+        assert result.status_code == 200
+        assert result.json == {"pattern": pattern, "params": params_map[pattern]}
+
+
+def test_run_batch_keeps_order(make_client):
+    params_map = {f"p{i}": {"n": i} for i in range(8)}
+    patterns = ["p5", "p1", "missing", "p7", "p0", "p1"]
+    with StandIn() as standin:
+        client = make_client({"format": ["get", "post_json"], "urls": [standin.url], "envelope": {}}, params_map)
+        enveloped = client.run_batch("post_json", patterns)
+        separate = client.run_batch("get", patterns)
+    for results in (enveloped, separate):
+        assert results[2] is None
+        for pattern, result in zip(patterns, results):
+            if pattern != "missing":
+                # GET のクエリパラメータは文字列で届く
+                assert str(result.json["params"]["n"]) == str(params_map[pattern]["n"])
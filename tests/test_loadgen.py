@@ -0,0 +1,25 @@
+from loadgen import LoadGenerator, parse_stage
+from standin import StandIn
+
+
+def failing(pattern, params):
+    raise RuntimeError("overloaded")
+
+
+def test_parse_stage():
+    assert parse_stage("5:30") == (5.0, 5.0, 30.0)
+    assert parse_stage("5-20:60") == (5.0, 20.0, 60.0)
+
+
+def test_load_reaches_server_even_when_breaker_would_open(make_client):
+    with StandIn(handler=failing) as standin:
+        client = make_client({"format": ["get"], "urls": [standin.url], "workers": 2,
+                              "breaker": {"failure_threshold": 1, "reset_timeout": 60}},
+                             {"p": {"x": 1}})
+        report = LoadGenerator(client, "get", max_in_flight=8, interval=0.5).run([(40, 40, 0.5)])
+        # ブレーカーやエンドポイントの除外でローカルに拒否されず、すべてサーバーに届く
+        assert report["summary"]["requests"] == standin.requests
+        assert report["summary"]["error_rate"] == 1.0
+    assert client.breaker_summary() == "回路: closed"
+    # 接続プールは元の大きさに戻る
+    assert client.pool_size == 2
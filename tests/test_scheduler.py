@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import BACKGROUND, INTERACTIVE, RequestScheduler, TokenBucket
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(**kwargs):
+        scheduler = RequestScheduler(**kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown()
+
+
+def test_interactive_jobs_run_before_queued_background(make_scheduler):
+    scheduler = make_scheduler(workers=1)
+    gate = threading.Event()
+    order = []
+    blocker = scheduler.submit("e", BACKGROUND, gate.wait)
+    futures = [scheduler.submit("e", BACKGROUND, order.append, f"b{i}") for i in range(3)]
+    futures += [scheduler.submit("e", INTERACTIVE, order.append, f"i{i}") for i in range(2)]
+    gate.set()
+    for future in [blocker] + futures:
+        future.result(timeout=5)
+    assert order == ["i0", "i1", "b0", "b1", "b2"]
+
+
+def test_interactive_call_does_not_wait_for_background(make_scheduler):
+    scheduler = make_scheduler(workers=4)
+    futures = [scheduler.submit("e", BACKGROUND, time.sleep, 0.5) for _ in range(12)]
+    time.sleep(0.05)
+    started = time.monotonic()
+    scheduler.call("e", INTERACTIVE, lambda: None)
+    assert time.monotonic() - started < 0.2
+    # background は workers - 1 までしか同時に動かない
+    assert scheduler.running[BACKGROUND] <= 3
+    for future in futures:
+        future.cancel()
+
+
+def test_token_bucket_gates_rate(make_scheduler):
+    scheduler = make_scheduler(workers=4, rate_limits={"e": {"rate": 20, "capacity": 1}})
+    started = time.monotonic()
+    futures = [scheduler.submit("e", BACKGROUND, time.monotonic) for _ in range(5)]
+    finished = [future.result(timeout=5) for future in futures]
+    # 容量1・毎秒20個なので、5件目は約0.2秒後
+    assert max(finished) - started >= 0.18
+    assert scheduler.stats()["endpoints"]["e"]["tokens"] < 1
+
+
+def test_token_bucket_delay():
+    bucket = TokenBucket(rate=2.0, capacity=2.0)
+    now = bucket.updated
+    assert bucket.delay(now) == 0.0
+    bucket.take()
+    bucket.take()
+    assert bucket.delay(now) == pytest.approx(0.5)
+    assert bucket.delay(now + 0.5) == 0.0
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from server import Service, ServiceClient
+from standin import StandIn, paged
+
+
+@pytest.fixture
+def service(make_client, tmp_path):
+    services = []
+
+    def start(info, params_map, socket_path=None):
+        svc = Service(make_client(info, params_map), port=0, socket_path=socket_path)
+        threading.Thread(target=svc.httpd.serve_forever, daemon=True).start()
+        services.append(svc)
+        if socket_path:
+            return ServiceClient(socket_path=socket_path)
+        return ServiceClient(port=svc.httpd.server_address[1])
+
+    yield start
+    for svc in services:
+        svc.httpd.shutdown()
+        svc.shutdown()
+
+
+SWEEP = {"s": {"n": {"$range": [0, 3]}}}
+
+
+def test_sweep_streams_rows(service):
+    with StandIn() as standin:
+        client = service({"format": ["post_json"], "urls": [standin.url]}, SWEEP)
+        rows = list(client.sweep("post_json", "s"))
+    assert [params for params, _ in rows] == [{"n": 0}, {"n": 1}, {"n": 2}]
+    assert all(result["status_code"] == 200 for _, result in rows)
+
+
+@pytest.mark.parametrize("format_option, pattern_option, priority", [
+    ("post_json", "s", "bogus"),
+    ("post_json", "missing", "background"),
+    ("put", "s", "background"),
+])
+def test_stream_rejects_bad_input_before_headers(service, format_option, pattern_option, priority):
+    with StandIn() as standin:
+        client = service({"format": ["post_json"], "urls": [standin.url]}, SWEEP)
+        for stream in (client.sweep, client.pages):
+            with pytest.raises(ValueError, match="400"):
+                list(stream(format_option, pattern_option, priority=priority))
+        # 応答が壊れていないので、同じ接続をそのまま使える
+        assert client.patterns()["patterns"] == ["s"]
+
+
+def test_pages_rejects_unknown_pagination_type(service):
+    with StandIn(handler=paged(30, 10)) as standin:
+        client = service({"format": ["get"], "urls": [standin.url]},
+                         {"p": {"$pagination": {"type": "cursor"}}})
+        with pytest.raises(ValueError, match="400"):
+            list(client.pages("get", "p"))
+
+
+def test_unix_socket_service(service, tmp_path):
+    client = service({"format": ["get"]}, SWEEP, socket_path=str(tmp_path / "service.sock"))
+    assert client.patterns()["patterns"] == ["s"]
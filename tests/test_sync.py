@@ -0,0 +1,51 @@
+import json
+
+from standin import StandIn, SyncSource
+
+
+def test_delta_sync(make_client, tmp_path):
+    source = SyncSource({"a": {"x": 1}, "c": {"z": 3}})
+    with StandIn(sync_source=source) as standin:
+        client = make_client({"format": ["get"]}, {"a": {"x": 0}, "b": {"y": 2}})
+        patterns = client.patterns
+
+        # 初回は全件を受け取り、配信元に無いパターンは削除する
+        ret = client.sync_params(standin.sync_url)
+        assert ret["status"] == "updated"
+        assert client.info.params_map == {"a": {"x": 1}, "c": {"z": 3}}
+        assert patterns == ["a", "c"]
+
+        # 変更が無ければ 304
+        assert client.sync_params(standin.sync_url)["status"] == "unchanged"
+
+        source.set("d", {"w": 4})
+        source.set("a", {"x": 9})
+        source.remove("c")
+        requests_before = standin.requests
+        ret = client.sync_params(standin.sync_url)
+        assert ret == {"status": "updated", "added": 1, "changed": 2, "removed": 1, "version": source.version}
+        assert standin.requests == requests_before + 1
+
+    # Client や UI が持っているパターン一覧もその場で更新される
+    assert client.patterns is patterns
+    assert patterns == ["a", "d"]
+    assert json.loads((tmp_path / "params_map.json").read_text(encoding="utf-8")) == {"a": {"x": 9}, "d": {"w": 4}}
+    state = json.loads((tmp_path / "params_map.json.sync.json").read_text(encoding="utf-8"))
+    assert state["version"] == source.version
+
+
+def test_failed_write_keeps_cursor(make_client, tmp_path):
+    source = SyncSource({"a": {"x": 1}})
+    with StandIn(sync_source=source) as standin:
+        client = make_client({"format": ["get"]}, {})
+        assert client.sync_params(standin.sync_url)["status"] == "updated"
+
+        source.set("b", {"y": 2})
+        write = client.info.params_jsfm.write
+        client.info.params_jsfm.write = lambda data, create_backup=True: False
+        assert client.sync_params(standin.sync_url)["status"] == "error"
+
+        # 書き込めるようになったら、失われた差分をもう一度受け取れる
+        client.info.params_jsfm.write = write
+        assert client.sync_params(standin.sync_url)["status"] == "updated"
+    assert json.loads((tmp_path / "params_map.json").read_text(encoding="utf-8")) == {"a": {"x": 1}, "b": {"y": 2}}
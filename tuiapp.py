@@ -6,6 +6,7 @@ from textual.widgets import TextArea
 from typing import List, Callable
 from info import Info
 from client import Client
+from profiler import get_profiler
 
 class TuiApp(App):
     """ラジオボタンとボタンを組み合わせたアプリ"""
@@ -36,6 +37,9 @@ class TuiApp(App):
         self.button_options = client.patterns
         self.client = client
         self.radio_index = 0
+        self.profiler = get_profiler()
+        # ページの追記中に別のボタンが押されたら古い追記を止めるための世代番号
+        self.page_generation = 0
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -64,6 +68,13 @@ class TuiApp(App):
                         yield Button(button_text, id=f"button_{i}")
             
             yield Label(id="result")
+            yield Label(self.client.breaker_summary(), id="breaker")
+
+            # プロファイル有効時は上位の関数を表示するパネルを追加
+            if self.profiler.enabled:
+                profile_area = TextArea(id="profile_area", read_only=True)
+                profile_area.text = "プロファイル: ボタンを押すと表示されます"
+                yield profile_area
         yield Footer()
 
     def on_mount(self) -> None:
@@ -90,6 +101,13 @@ class TuiApp(App):
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """ボタンが押されたとき"""
+        with self.profiler.profile("TuiApp.on_button_pressed"):
+            self._handle_button_pressed(event)
+
+        if self.profiler.enabled:
+            self.query_one("#profile_area", TextArea).text = self.profiler.summary()
+
+    def _handle_button_pressed(self, event: Button.Pressed) -> None:
         button_id = event.button.id
         
         # Exitボタンがクリックされた場合
@@ -113,12 +131,45 @@ class TuiApp(App):
             # result_label.update(f"選択中: {selected_option} {selected_value} | {selected_index}| ボタン: {button_text}")
             result_label.update(f"選択中: {result_text} | ボタン: {button_text}")
 
+            self.page_generation += 1
+            # ページングされたパターンは届いたページから順に追記する
+            try:
+                spec = self.client.page_spec(str(button_text))
+            except ValueError as e:
+                # "$pagination" の設定が不正な場合は結果の代わりにエラーを表示する
+                output_area.text = f"Error: {button_text}: {e}"
+                return
+            if spec is not None:
+                output_area.text = ""
+                generation = self.page_generation
+                self.run_worker(lambda: self._stream_pages(generation, str(radio_text), str(button_text)),
+                                thread=True)
+                return
+
             try:
-                run_result = self.client.run(radio_text, button_text)
+                with self.profiler.section("Client.run"):
+                    run_result = self.client.run(radio_text, button_text)
             except Exception as e:
                 run_result = e
 
-            output_area.text = str(run_result)
+            with self.profiler.section("render"):
+                output_area.text = str(run_result)
+                self.query_one("#breaker", Label).update(self.client.breaker_summary())
+
+    def _stream_pages(self, generation: int, format_option: str, pattern_option: str) -> None:
+        """
+        ワーカースレッドで client.iter_pages を回し、ページごとに TextArea に追記する
+        """
+        for count, page in enumerate(self.client.iter_pages(format_option, pattern_option), 1):
+            if generation != self.page_generation:
+                return
+            self.call_from_thread(self._append_output, generation, f"--- {count}ページ目 ---\n{page}\n")
+
+    def _append_output(self, generation: int, text: str) -> None:
+        if generation != self.page_generation:
+            return
+        output_area = self.query_one("#output_area", TextArea)
+        output_area.insert(text, output_area.document.end)
 
 if __name__ == "__main__":
     info = Info("info3.json")